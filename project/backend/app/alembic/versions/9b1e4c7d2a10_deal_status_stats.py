@@ -0,0 +1,42 @@
+"""deal status stats
+
+Revision ID: 9b1e4c7d2a10
+Revises: 3452a6e6b270
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ENUM
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e4c7d2a10'
+down_revision: Union[str, Sequence[str], None] = '3452a6e6b270'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('deal_status_stats',
+    sa.Column('status', ENUM('NEW', 'NEGOTIATION', 'WON', 'LOST', name='dealstatus', create_type=False), nullable=False),
+    sa.Column('deals_count', sa.BigInteger(), nullable=False),
+    sa.Column('amount_sum', sa.Numeric(), nullable=False),
+    sa.PrimaryKeyConstraint('status')
+    )
+    # Заполняем счётчики по текущим данным, по строке на каждый статус
+    op.execute("""
+        INSERT INTO deal_status_stats (status, deals_count, amount_sum)
+        SELECT s.status, count(d.id), coalesce(sum(d.amount), 0)
+        FROM unnest(enum_range(NULL::dealstatus)) AS s(status)
+        LEFT JOIN deals d ON d.status = s.status
+        GROUP BY s.status
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('deal_status_stats')
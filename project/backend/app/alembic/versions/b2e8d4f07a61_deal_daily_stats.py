@@ -0,0 +1,43 @@
+"""deal daily stats
+
+Revision ID: b2e8d4f07a61
+Revises: a7d3e5b19c04
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ENUM
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e8d4f07a61'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e5b19c04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('deal_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', ENUM('NEW', 'NEGOTIATION', 'WON', 'LOST', name='dealstatus', create_type=False), nullable=False),
+    sa.Column('assigned_to', sa.Integer(), nullable=False),
+    sa.Column('deals_count', sa.BigInteger(), nullable=False),
+    sa.Column('amount_sum', sa.Numeric(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status', 'assigned_to')
+    )
+    # Первичное заполнение по текущим сделкам, дальше - из DealService и reconcile
+    op.execute("""
+        INSERT INTO deal_daily_stats (day, status, assigned_to, deals_count, amount_sum)
+        SELECT created_at::date, status, coalesce(assigned_to, 0), count(*), sum(amount)
+        FROM deals
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('deal_daily_stats')
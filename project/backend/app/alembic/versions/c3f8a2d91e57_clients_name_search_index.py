@@ -0,0 +1,34 @@
+"""clients name search index
+
+Revision ID: c3f8a2d91e57
+Revises: 9b1e4c7d2a10
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a2d91e57'
+down_revision: Union[str, Sequence[str], None] = '9b1e4c7d2a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Колонка name есть в модели, но не попала ни в одну миграцию
+    op.execute("ALTER TABLE clients ADD COLUMN IF NOT EXISTS name VARCHAR")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_clients_name_trgm', 'clients', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clients_name_trgm', table_name='clients')
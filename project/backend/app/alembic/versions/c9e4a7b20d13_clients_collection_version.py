@@ -0,0 +1,44 @@
+"""clients collection version
+
+Revision ID: c9e4a7b20d13
+Revises: b2e8d4f07a61
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e4a7b20d13'
+down_revision: Union[str, Sequence[str], None] = 'b2e8d4f07a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("INSERT INTO collection_versions (name, version, updated_at) VALUES ('clients', 0, now())")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_clients_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE collection_versions SET version = version + 1, updated_at = LOCALTIMESTAMP
+            WHERE name = 'clients';
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER clients_bump_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON clients
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_clients_version()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS clients_bump_version ON clients")
+    op.execute("DROP FUNCTION IF EXISTS bump_clients_version()")
+    op.execute("DELETE FROM collection_versions WHERE name = 'clients'")
@@ -0,0 +1,47 @@
+"""deals composite indexes
+
+Revision ID: e71d5b0c4f22
+Revises: c3f8a2d91e57
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e71d5b0c4f22'
+down_revision: Union[str, Sequence[str], None] = 'c3f8a2d91e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_deals_created_at_id': ['created_at', 'id'],
+    'ix_deals_status_created_at_id': ['status', 'created_at', 'id'],
+    'ix_deals_client_id_created_at_id': ['client_id', 'created_at', 'id'],
+    'ix_deals_assigned_to_created_at_id': ['assigned_to', 'created_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в deals, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'deals', columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+        # Покрывается ix_deals_status_created_at_id
+        op.drop_index('ix_deals_status', table_name='deals',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_deals_status', 'deals', ['status'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        for name in INDEXES:
+            op.drop_index(name, table_name='deals',
+                          postgresql_concurrently=True, if_exists=True)
@@ -1,12 +1,86 @@
+import asyncio
+import logging
+import threading
+import time
+
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import select, insert, exc, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
 
+
+class PoolStats:
+    """Счётчики ожидания соединения из пула"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait: float, timed_out: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Очередь соединений, которая замеряет время ожидания и таймауты"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            pool_stats.record(time.perf_counter() - started, timed_out)
+
+
+def _engine_options(url: str) -> dict:
+    """Параметры пула из Settings; кэш запросов asyncpg только для asyncpg"""
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+    if make_url(url).drivername == 'postgresql+asyncpg':
+        options['connect_args'] = {
+            'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,
     future=True,
+    **_engine_options(settings.DATABASE_URL),
 )
 
 # Create async session maker
@@ -16,9 +90,24 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Реплика для чтения, если задана
+replica_engine = create_async_engine(
+    settings.DATABASE_REPLICA_URL,
+    echo=False,
+    future=True,
+    **_engine_options(settings.DATABASE_REPLICA_URL),
+) if settings.DATABASE_REPLICA_URL else None
+
+replica_session_maker = async_sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+) if replica_engine is not None else None
+
 # Base class for models
 Base = declarative_base()
-from models import User, Client, Deal, Interaction, Task
+from models import User, Client, Deal, Interaction, Task, DealStatusStats, CollectionVersion, DealDailyStats
+from dtos.enums import DealStatus
 
 
 async def get_db() -> AsyncSession:
@@ -30,7 +119,128 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+logger = logging.getLogger(__name__)
+
+# Клиент, который недавно что-то изменил, читает с основной БД (read-your-writes)
+READ_PRIMARY_COOKIE = 'crm_read_primary'
+READ_METHODS = ('GET', 'HEAD')
+
+# Отставание реплики PostgreSQL в секундах; 0, если всё полученное уже применено
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class ReplicaMonitor:
+    """Доступность и отставание реплики, проверяются не чаще раза в check_seconds на воркер"""
+
+    def __init__(self, replica, check_seconds: float, max_lag_seconds: float, timeout: float):
+        self.replica = replica
+        self.check_seconds = check_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.timeout = timeout
+        self.healthy = replica is not None
+        self.lag_seconds = 0.0
+        self._checked_at: float | None = None
+        self.failures = 0
+        self.reads = {'replica': 0, 'primary': 0, 'sticky': 0}
+
+    async def _measure_lag(self) -> float:
+        async with self.replica.connect() as conn:
+            if conn.dialect.name != 'postgresql':
+                await conn.execute(text('SELECT 1'))
+                return 0.0
+            return float(await conn.scalar(REPLICA_LAG_SQL) or 0)
+
+    async def is_usable(self) -> bool:
+        if self.replica is None:
+            return False
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_seconds:
+            # Соседние запросы не ждут проверки и решают по прошлому результату
+            self._checked_at = now
+            try:
+                self.lag_seconds = await asyncio.wait_for(self._measure_lag(), self.timeout)
+                self.healthy = True
+            except Exception as e:
+                self.healthy = False
+                self.failures += 1
+                logger.warning('Реплика недоступна, чтение идёт с основной БД: %r', e)
+        return self.healthy and self.lag_seconds <= self.max_lag_seconds
+
+    def stats(self) -> dict:
+        return {
+            'configured': self.replica is not None,
+            'healthy': self.healthy,
+            'lag_seconds': self.lag_seconds,
+            'failures': self.failures,
+            'reads': dict(self.reads),
+        }
+
+
+replica_monitor = ReplicaMonitor(
+    replica_engine,
+    check_seconds=settings.REPLICA_CHECK_SECONDS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    timeout=settings.REPLICA_CHECK_TIMEOUT,
+)
+
+
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)) -> AsyncSession:
+    """Сессия для чтения: реплика в GET-запросах, иначе та же сессия основной БД, что и get_db.
+
+    На основную БД чтение уходит, если реплика не задана, недоступна или
+    отстаёт, а также если клиент недавно сам что-то изменил.
+    """
+    if replica_session_maker is None or request.method not in READ_METHODS:
+        yield db
+        return
+    if READ_PRIMARY_COOKIE in request.cookies:
+        replica_monitor.reads['sticky'] += 1
+        yield db
+        return
+    if not await replica_monitor.is_usable():
+        replica_monitor.reads['primary'] += 1
+        yield db
+        return
+
+    replica_monitor.reads['replica'] += 1
+    async with replica_session_maker() as session:
+        yield session
+
+
+def get_pool_stats() -> dict:
+    """Состояние пула соединений этого воркера"""
+    pool = engine.sync_engine.pool
+    return {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        # QueuePool считает overflow от -pool_size, пока пул не заполнен
+        'overflow': max(0, pool.overflow()),
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        **pool_stats.snapshot(),
+    }
+
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+        # Счётчики статистики должны существовать для каждого статуса
+        existing = set((await conn.execute(select(DealStatusStats.status))).scalars())
+        missing = [
+            {'status': status, 'deals_count': 0, 'amount_sum': 0}
+            for status in DealStatus if status not in existing
+        ]
+        if missing:
+            await conn.execute(insert(DealStatusStats), missing)
+
+        versions = set((await conn.execute(select(CollectionVersion.name))).scalars())
+        for name in ('deals', 'clients'):
+            if name not in versions:
+                await conn.execute(insert(CollectionVersion).values(name=name, version=0))
@@ -1,7 +1,11 @@
-from database import get_db
-from models.user import User
+import hmac
+
+from database import get_read_db
 from services.auth_service import AuthService
-from fastapi import Depends, HTTPException, status
+from services.principal_cache import Principal, principal_cache
+from services.token_revocation import token_revocation
+from config import settings
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,11 +14,18 @@ from utils.auth import decode_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+LOCAL_HOSTS = ('127.0.0.1', '::1', 'localhost')
+
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-) -> User:
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_read_db)
+) -> Principal:
     """Проверяет токен и возвращает текущего пользователя"""
+    return await authenticate(token, db)
+
+
+async def authenticate(token: str, db: AsyncSession) -> Principal:
+    """Пользователь по токену или 401"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Неверные учетные данные",
@@ -24,13 +35,50 @@ async def get_current_user(
     try:
         payload = decode_token(token)
         username: str = payload.get("sub")
-        if username is None:
+        # Билет (scope) годится только для своего маршрута, не вместо access-токена
+        if username is None or "scope" in payload:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    service = AuthService(db)
-    user = await service.get_by_username(username)
-    if user is None:
+    # Токен с claims: без запроса к users, кроме периодического перечитывания списка отзыва
+    if settings.AUTH_CLAIMS_TOKENS and "uid" in payload:
+        await token_revocation.refresh_if_stale(db)
+        if token_revocation.is_revoked(payload["uid"], payload.get("tv", 0)):
+            raise credentials_exception
+        return Principal.from_claims(payload)
+
+    principal = principal_cache.get(username)
+    if principal is None:
+        generation = principal_cache.generation
+        user = await AuthService(db).get_by_username(username)
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.set(principal, generation)
+
+    if not principal.is_active:
         raise credentials_exception
-    return user
+    return principal
+
+
+def check_ticket(ticket: str, scope: str) -> dict:
+    """Payload короткоживущего билета для scope или 401. Без запроса к БД: билет выдан только что"""
+    try:
+        payload = decode_token(ticket)
+    except JWTError:
+        payload = {}
+    if payload.get("scope") != scope or "sub" not in payload:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный билет")
+    return payload
+
+
+def require_ops_access(request: Request) -> None:
+    """Доступ к служебным эндпоинтам: по OPS_TOKEN, а без него - только с localhost"""
+    if settings.OPS_TOKEN:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), settings.OPS_TOKEN.encode()):
+            return
+    elif request.client is not None and request.client.host in LOCAL_HOSTS:
+        return
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Доступ запрещён")
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 from .enums import DealStatus
 
 
@@ -36,8 +36,79 @@ class Config:
     from_attributes = True
 
 
+class DealImportError(BaseModel):
+    row: int = Field(..., description='Номер строки в файле')
+    error: str
+
+
+class DealImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[DealImportError] = Field(default_factory=list, description='Первые ошибки по строкам')
+
+
 class DealStats(BaseModel):
     total: int
     by_status: dict[str, int]
-    won_amount: float
-    avg_check: float
\ No newline at end of file
+    won_amount: float = Field(..., description='Сумма выигранных сделок когорты')
+    avg_check: float
+
+class DealBulkFilter(BaseModel):
+    status: Optional[DealStatus] = None
+    client_id: Optional[int] = Field(None, gt=0)
+    assigned_to: Optional[int] = Field(None, gt=0)
+
+    @model_validator(mode='after')
+    def check_not_empty(self):
+        if self.status is None and self.client_id is None and self.assigned_to is None:
+            raise ValueError('Пустой фильтр изменил бы все сделки')
+        return self
+
+
+class DealBulkPatch(BaseModel):
+    status: Optional[DealStatus] = Field(None, description='Новый статус')
+    assigned_to: Optional[int] = Field(None, gt=0, description='Новый ответственный, null - снять')
+
+    @model_validator(mode='after')
+    def check_not_empty(self):
+        if not self.model_fields_set:
+            raise ValueError('Нечего изменять')
+        if 'status' in self.model_fields_set and self.status is None:
+            raise ValueError('Статус не может быть пустым')
+        return self
+
+
+class DealBulkUpdate(BaseModel):
+    ids: Optional[list[int]] = Field(None, min_length=1, max_length=10000, description='ID сделок')
+    filter: Optional[DealBulkFilter] = Field(None, description='Или фильтр, как у списка сделок')
+    patch: DealBulkPatch
+
+    @model_validator(mode='after')
+    def check_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError('Нужно указать ровно одно из ids или filter')
+        return self
+
+
+class DealBulkResult(BaseModel):
+    updated: int
+    by_status: dict[str, int] = Field(default_factory=dict, description='Изменённые сделки по прежнему статусу')
+
+
+class DealEventsTicket(BaseModel):
+    ticket: str
+    expires_in: int = Field(..., description='Секунд до истечения билета')
+
+
+class DealCohortRow(BaseModel):
+    day: Optional[date] = Field(None, description='День создания, если группировка по дням')
+    assigned_to: Optional[int] = Field(None, description='Ответственный, если группировка по менеджерам')
+    created: int = Field(..., description='Создано сделок в когорте')
+    by_status: dict[str, int] = Field(..., description='Сколько из них сейчас в каждом статусе, независимо от даты смены статуса')
+    won_amount: float = Field(..., description='Сумма выигранных сделок когорты')
+
+
+class DealCohortFunnel(BaseModel):
+    date_from: date
+    date_to: date
+    rows: list[DealCohortRow]
@@ -0,0 +1,35 @@
+"""Пересчёт дневной свёртки deal_daily_stats по таблице deals.
+
+Нужен после включения DEAL_DAILY_STATS_STORE на работающей базе и как
+периодическая сверка (например, раз в сутки из cron) за последние дни:
+
+    python -m jobs.reconcile_deal_rollup --days 7
+    python -m jobs.reconcile_deal_rollup --all
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+
+from database import async_session_maker
+from services.deal_analytics_service import DealAnalyticsService
+
+
+async def reconcile(since: date | None) -> int:
+    async with async_session_maker() as session:
+        return await DealAnalyticsService(session).reconcile(since)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--days', type=int, default=7, help='Сколько последних дней пересчитать')
+    group.add_argument('--all', action='store_true', help='Пересчитать всю историю')
+    args = parser.parse_args()
+
+    since = None if args.all else date.today() - timedelta(days=args.days)
+    rows = asyncio.run(reconcile(since))
+    print(f'deal_daily_stats: {rows} строк с {since or "начала"}')
+
+
+if __name__ == '__main__':
+    main()
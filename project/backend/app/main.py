@@ -1,30 +1,121 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from routes import auth, deals, clients
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="CRM API")
+from config import settings
+
+# FastAPI, роутеры, сервисы, БД и метрики импортируются в create_app() и lifespan:
+# import main дёшев, а стоимость старта видна в bench_import_time.py
+
+
+@asynccontextmanager
+async def lifespan(app):
+    from services.deal_events import deal_events
+    from utils.background import job_queue
+    from utils.logging_config import shutdown_logging
+    from utils.warmup import warmup
+
+    job_queue.start()
+    await deal_events.start()
+    warmup.start()
+    yield
+    await warmup.stop()
+    await deal_events.stop()
+    await job_queue.drain(settings.JOB_QUEUE_DRAIN_SECONDS)
+    shutdown_logging()
 
-app.include_router(auth.router)
-app.include_router(deals.router)
-app.include_router(clients.router)
 
 FRONTEND_URLS = ['0.0.0.0:8000', '0.0.0.0:8004', '127.0.0.1:8000', 'localhost:8000']
-app.add_middleware(CORSMiddleware,
-                   allow_origins=FRONTEND_URLS,  # Только ваши домены
-                   allow_credentials=True,
-                   allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
-                   allow_headers=["*"],  # Или конкретно: ["Authorization", "Content-Type"]
-                   )
 
-@app.get("/")
-async def root():
-    return {"message": "CRM API"}
 
-@app.get("/health")
-async def health():
-    return {"status": "ok"}
+def create_app():
+    """Собрать приложение: роутеры, middleware и служебные эндпоинты"""
+    from fastapi import Depends, FastAPI, Response
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse
+
+    from database import engine, get_pool_stats, replica_engine, replica_monitor
+    from deps.auth import require_ops_access
+    from routes import auth, deals, clients
+    from services.deal_events import deal_events
+    from services.principal_cache import principal_cache
+    from services.token_revocation import token_revocation
+    from utils.auth import get_password_hasher_stats, get_token_cache_stats
+    from utils.background import job_queue
+    from utils.cache import get_cache
+    from utils.logging_config import RequestIdMiddleware, get_logging_stats, setup_logging
+    from utils.metrics import MetricsMiddleware, instrument_engine, render_metrics
+    from utils.read_your_writes import ReadYourWritesMiddleware
+    from utils.warmup import warmup
+
+    setup_logging()
+
+    app = FastAPI(title="CRM API", lifespan=lifespan)
+
+    app.include_router(auth.router)
+    app.include_router(deals.router)
+    app.include_router(clients.router)
+
+    app.add_middleware(CORSMiddleware,
+                       allow_origins=FRONTEND_URLS,  # Только ваши домены
+                       allow_credentials=True,
+                       allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+                       allow_headers=["*"],  # Или конкретно: ["Authorization", "Content-Type"]
+                       expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Last-Modified", "X-Request-ID"],
+                       )
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    instrument_engine(engine)
+    if replica_engine is not None:
+        app.add_middleware(ReadYourWritesMiddleware)
+        instrument_engine(replica_engine)
+
+    @app.get("/")
+    async def root():
+        return {"message": "CRM API"}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/health/ready")
+    async def health_ready():
+        """Готовность для балансировщика: 503, пока воркер не прогрет"""
+        if not warmup.ready:
+            return JSONResponse({"status": "warming", **warmup.stats()}, status_code=503)
+        return {"status": "ready"}
+
+    @app.get("/health/stats", dependencies=[Depends(require_ops_access)])
+    async def health_stats():
+        return {
+            "password_hasher": get_password_hasher_stats(),
+            "principal_cache": principal_cache.stats(),
+            "token_cache": get_token_cache_stats(),
+            "token_revocation": token_revocation.stats(),
+            "db_pool": get_pool_stats(),
+            "db_replica": replica_monitor.stats(),
+            "response_cache": get_cache().stats(),
+            "deal_events": deal_events.stats(),
+            "background_jobs": job_queue.stats(),
+            "logging": get_logging_stats(),
+            "warmup": warmup.stats(),
+        }
+
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_ops_access)])
+    async def metrics():
+        body, content_type = render_metrics()
+        return Response(body, media_type=content_type)
+
+    return app
+
+
+def __getattr__(name: str):
+    """Для uvicorn main:app: приложение собирается при первом обращении, а не при импорте"""
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8004)
\ No newline at end of file
+    uvicorn.run(create_app(), host="0.0.0.0", port=8004)
\ No newline at end of file
@@ -3,5 +3,8 @@ from .client import Client
 from .deal import Deal
 from .interaction import Interaction
 from .task import Task
+from .deal_stats import DealStatusStats
+from .collection_version import CollectionVersion
+from .deal_daily_stats import DealDailyStats
 
-__all__ = ["User", "Client", "Deal", "Interaction", "Task"]
\ No newline at end of file
+__all__ = ["User", "Client", "Deal", "Interaction", "Task", "DealStatusStats", "CollectionVersion", "DealDailyStats"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, DDL, event
 
 from sqlalchemy.orm import relationship
 from database import Base
@@ -8,6 +8,10 @@ from datetime import datetime
 class Client(Base):
     """Сущность Клиент в базе данных"""
     __tablename__ = "clients"
+    __table_args__ = (
+        # Поиск по подстроке имени (ILIKE '%...%'), требует расширения pg_trgm
+        Index("ix_clients_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
@@ -21,4 +25,39 @@ class Client(Base):
     creator = relationship("User", back_populates="clients")
     deals = relationship("Deal", back_populates="client", cascade="all, delete-orphan")
     tasks = relationship("Task", back_populates="client", cascade="all, delete-orphan")
-    interactions = relationship("Interaction", back_populates="client", cascade="all, delete-orphan")
\ No newline at end of file
+    interactions = relationship("Interaction", back_populates="client", cascade="all, delete-orphan")
+
+
+# Версия коллекции клиентов (для ETag списка) растёт триггером на любую запись в clients,
+# поэтому учитываются и изменения в обход приложения. На PostgreSQL один раз на оператор
+CLIENTS_VERSION_PG = (
+    DDL("""
+        CREATE OR REPLACE FUNCTION bump_clients_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE collection_versions SET version = version + 1, updated_at = LOCALTIMESTAMP
+            WHERE name = 'clients';
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """),
+    DDL("""
+        CREATE TRIGGER clients_bump_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON clients
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_clients_version()
+    """),
+)
+CLIENTS_VERSION_SQLITE = tuple(
+    DDL(f"""
+        CREATE TRIGGER clients_bump_version_{operation.lower()} AFTER {operation} ON clients
+        BEGIN
+            UPDATE collection_versions SET version = version + 1, updated_at = datetime('now', 'localtime')
+            WHERE name = 'clients';
+        END
+    """)
+    for operation in ('INSERT', 'UPDATE', 'DELETE')
+)
+
+for ddl in CLIENTS_VERSION_PG:
+    event.listen(Base.metadata, 'after_create', ddl.execute_if(dialect='postgresql'))
+for ddl in CLIENTS_VERSION_SQLITE:
+    event.listen(Base.metadata, 'after_create', ddl.execute_if(dialect='sqlite'))
@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from sqlalchemy import Column, String, BigInteger, DateTime
+
+from database import Base
+
+
+class CollectionVersion(Base):
+    """Версия коллекции (например, всех сделок), растёт при каждом изменении в ней"""
+    __tablename__ = "collection_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
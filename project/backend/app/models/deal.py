@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -10,12 +10,20 @@ from dtos.enums import DealStatus
 class Deal(Base):
     """Сущность Сделка в базе данных"""
     __tablename__ = "deals"
+    __table_args__ = (
+        # Индексы под DealService.get_all: фильтр по равенству + ORDER BY created_at DESC, id DESC.
+        # Сочетания фильтров обслуживаются самым селективным из них.
+        Index("ix_deals_created_at_id", "created_at", "id"),
+        Index("ix_deals_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_deals_client_id_created_at_id", "client_id", "created_at", "id"),
+        Index("ix_deals_assigned_to_created_at_id", "assigned_to", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     amount = Column(Numeric, nullable=False)
-    status = Column(Enum(DealStatus, name="dealstatus"), nullable=False, default=DealStatus.NEW, index=True)
+    status = Column(Enum(DealStatus, name="dealstatus"), nullable=False, default=DealStatus.NEW)
 
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
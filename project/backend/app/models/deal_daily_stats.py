@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, Date, Enum, Integer, Numeric
+
+from database import Base
+from dtos.enums import DealStatus
+
+
+class DealDailyStats(Base):
+    """Дневная свёртка когорт сделок: день создания, текущий статус, ответственный.
+
+    assigned_to = 0 - сделки без ответственного (NULL нельзя в первичном ключе).
+    """
+    __tablename__ = "deal_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(DealStatus, name="dealstatus"), primary_key=True)
+    assigned_to = Column(Integer, primary_key=True, default=0)
+    deals_count = Column(BigInteger, nullable=False, default=0)
+    amount_sum = Column(Numeric, nullable=False, default=0)
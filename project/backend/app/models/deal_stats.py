@@ -0,0 +1,13 @@
+from sqlalchemy import Column, BigInteger, Numeric, Enum
+
+from database import Base
+from dtos.enums import DealStatus
+
+
+class DealStatusStats(Base):
+    """Счётчики сделок по статусам, поддерживаемые инкрементально из DealService"""
+    __tablename__ = "deal_status_stats"
+
+    status = Column(Enum(DealStatus, name="dealstatus"), primary_key=True)
+    deals_count = Column(BigInteger, nullable=False, default=0)
+    amount_sum = Column(Numeric, nullable=False, default=0)
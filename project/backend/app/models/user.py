@@ -14,6 +14,8 @@ class User(Base):
     full_name = Column(String(255), nullable=True)
     role = Column(String(20), default="manager")  # admin или manager
     is_active = Column(Boolean, default=True)
+    # Растёт при смене пароля, роли или деактивации, старые токены с claims перестают действовать
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import get_db
+from database import get_db, get_read_db
 from dtos.auth import UserCreateDTO, UserResponseDTO, TokenDTO
 from services.auth_service import AuthService
 from deps.auth import get_current_user
-from models.user import User
+from utils.query_budget import query_budget
+from services.principal_cache import Principal, principal_cache
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 @router.post("/register", response_model=UserResponseDTO, status_code=status.HTTP_201_CREATED)
+@query_budget(3)  # проверка дубликата, INSERT, refresh
 async def register(
     user_data: UserCreateDTO,
     db: AsyncSession = Depends(get_db)
@@ -23,6 +25,7 @@ async def register(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login", response_model=TokenDTO, )
+@query_budget(1)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
@@ -36,6 +39,22 @@ async def login(
         raise HTTPException(status_code=401, detail=str(e))
 
 @router.get("/me", response_model=UserResponseDTO)
-async def get_me(current_user: User = Depends(get_current_user)):
+@query_budget(1)  # пользователь, если его нет в кэше или в токене только claims
+async def get_me(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
     """Получить данные текущего пользователя"""
-    return current_user
+    if current_user.is_complete:
+        return current_user
+    principal = principal_cache.get(current_user.username)
+    if principal is None:
+        generation = principal_cache.generation
+        user = await AuthService(db).get_by_username(current_user.username)
+        if user is None:
+            raise HTTPException(status_code=401, detail="Неверные учетные данные")
+        principal = Principal.from_user(user)
+        principal_cache.set(principal, generation)
+    if not principal.is_active:
+        raise HTTPException(status_code=401, detail="Неверные учетные данные")
+    return principal
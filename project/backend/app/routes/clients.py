@@ -1,26 +1,47 @@
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from database import get_db
 from dtos.client import ClientResponse
-from models import Client
-from models.user import User
+from services.client_service import ClientService
+from services.principal_cache import Principal
 from deps.auth import get_current_user
-from typing import List
+from utils.query_budget import query_budget
+from utils.http_cache import is_not_modified, make_etag, not_modified_response, set_validators
+from utils.serialization import dump_rows
+from typing import List, Optional, Annotated
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/api/clients', tags=['Clients'])
 
+ClientServiceDep = Annotated[ClientService, Depends(ClientService)]
+
 @router.get('/', response_model=List[ClientResponse])
+@query_budget(3)  # пользователь, версия, страница
 async def get_clients(
-        current_user: User = Depends(get_current_user),
-        db: AsyncSession = Depends(get_db) ,
+        request: Request,
+        limit: int = Query(100, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description='Курсор следующей страницы из X-Next-Cursor'),
+        search: Optional[str] = Query(None, min_length=1, max_length=255, description='Поиск по имени'),
+        current_user: Principal = Depends(get_current_user),
+        service: ClientServiceDep = None,
 ):
-    logger.info(f'Запрос списка клиентов от пользователя {current_user.id}')
-    query = select(Client)
-    result = await db.execute(query)
-    clients = list(result.scalars().all())
-    return clients
+    logger.info('Запрос списка клиентов от пользователя %s', current_user.id)
+
+    version, last_modified = await service.get_version()
+    etag = make_etag('clients', version, request.url.query)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    try:
+        clients, next_cursor = await service.get_all(
+            limit=limit, cursor=cursor, search=search, as_rows=True
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response = Response(dump_rows(clients, ClientResponse), media_type='application/json')
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    set_validators(response, etag, last_modified)
+
+    return response
@@ -1,53 +1,112 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 
-from database import get_db
-from dtos.deal import DealCreate, DealUpdate, DealResponse, DealStats, DealStatus
+from config import settings
+from dtos.deal import (
+    DealBulkResult, DealBulkUpdate, DealCreate, DealUpdate, DealResponse, DealStats, DealStatus,
+    DealImportResult, DealCohortFunnel, DealEventsTicket
+)
 from services.deal_service import DealService
-from models.user import User
-from deps.auth import get_current_user
-from typing import List, Optional, Annotated
+from services.deal_analytics_service import DealAnalyticsService
+from services.principal_cache import Principal
+from deps.auth import check_ticket, get_current_user
+from services.deal_events import deal_events
+from utils.auth import create_access_token
+from utils.query_budget import query_budget
+from utils.cache import cache_key, get_cache, pack_response, unpack_response
+from utils.deal_export import MEDIA_TYPES, encode_rows
+from utils.deal_import import iter_import_rows
+from utils.serialization import dump_rows
+from utils.http_cache import (
+    has_conditional_headers, is_not_modified, make_etag, not_modified_response, set_validators
+)
+from typing import List, Optional, Annotated, Literal
+from datetime import date, timedelta
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/api/deals', tags=['Deals'])
 
 DealServiceDep = Annotated[DealService, Depends(DealService)]
+DealAnalyticsServiceDep = Annotated[DealAnalyticsService, Depends(DealAnalyticsService)]
+
+# scope билета на поток событий: такой токен не принимается как access-токен
+EVENTS_SCOPE = 'deal_events'
 
 @router.get('/', response_model=List[DealResponse])
+@query_budget(4)  # пользователь, версия, страница, COUNT при with_total
 async def get_deals(
+        request: Request,
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=500),
         status: Optional[DealStatus] = Query(None),
         client_id: Optional[int] = Query(None),
         assigned_to: Optional[int] = Query(None),
-        current_user: User = Depends(get_current_user),
+        cursor: Optional[str] = Query(None, description='Курсор следующей страницы из X-Next-Cursor'),
+        with_total: bool = Query(False, description='Вернуть общее количество в X-Total-Count'),
+        current_user: Principal = Depends(get_current_user),
         service: DealServiceDep = None,
 ):
-    logger.info(f'Запрос списка сделок от пользователя {current_user.id}')
-
-    deals, total = await service.get_all(
-        skip=skip,
-        limit=limit,
-        status=status,
-        client_id=client_id,
-        assigned_to=assigned_to
-    )
+    logger.info('Запрос списка сделок от пользователя %s', current_user.id)
+
+    # Версию читаем до списка: изменение между ними только сбросит ETag при следующем запросе
+    version, version_updated_at = await service.get_version()
+    etag = make_etag('deals', version, request.url.query)
+    if is_not_modified(request, etag, version_updated_at):
+        return not_modified_response(etag, version_updated_at)
+
+    # Версия входит в ключ, поэтому запись из кэша любого воркера не переживёт изменения сделок
+    cache = get_cache()
+    key = cache_key('deals:list', version, request.url.query)
+    cached = await cache.get(key)
+    if cached is not None:
+        body, headers = unpack_response(cached)
+    else:
+        try:
+            deals, total, next_cursor = await service.get_all(
+                skip=skip,
+                limit=limit,
+                status=status,
+                client_id=client_id,
+                assigned_to=assigned_to,
+                cursor=cursor,
+                with_total=with_total,
+                as_rows=True
+            )
+        except ValueError as e:
+            # параметр status затеняет fastapi.status, поэтому код ответа числом
+            raise HTTPException(status_code=400, detail=str(e))
+
+        headers = {}
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        if total is not None:
+            headers['X-Total-Count'] = str(total)
+        body = dump_rows(deals, DealResponse)
+        await cache.set(
+            key, pack_response(body, headers), settings.CACHE_TTL_SECONDS,
+            DealService.list_cache_tags(status, client_id, assigned_to)
+        )
 
-    return deals
+    response = Response(body, media_type='application/json', headers=headers)
+    set_validators(response, etag, version_updated_at)
+    return response
 
 
 @router.post('/', response_model=DealResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(9)  # пользователь, клиент, ответственный, INSERT, счётчики, свёртка, refresh, версия, NOTIFY
 async def create_deal(
         deal_data: DealCreate,
-        current_user=Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
     service: DealServiceDep = None,
 ):
-    logger.info(f'Создание новой сделки пользователем {current_user.id}')
+    logger.info('Создание новой сделки пользователем %s', current_user.id)
 
     try:
         deal = await service.create(deal_data, created_by=current_user.id)
-        logger.info(f'Сделка создана: ID={deal.id}')
+        logger.info('Сделка создана: ID=%s', deal.id)
         return deal
     except ValueError as e:
         raise HTTPException(
@@ -56,31 +115,168 @@ async def create_deal(
         )
 
 
+@router.post('/import', response_model=DealImportResult)
+# пользователь, версия, NOTIFY; на пачку: клиенты, ответственные, INSERT/COPY, счётчики, свёртка
+@query_budget(8, per_batch=5)
+async def import_deals(
+        file: UploadFile = File(..., description='NDJSON или CSV с заголовком'),
+        format: Optional[Literal['ndjson', 'csv']] = Query(None, description='По умолчанию по расширению файла'),
+        current_user: Principal = Depends(get_current_user),
+        service: DealServiceDep = None,
+):
+    fmt = format or ('csv' if (file.filename or '').lower().endswith('.csv') else 'ndjson')
+    logger.info('Импорт сделок (%s) пользователем %s', fmt, current_user.id)
+
+    result = await service.import_deals(iter_import_rows(file, fmt), created_by=current_user.id)
+    return result
+
+
+@router.post('/bulk', response_model=DealBulkResult)
+@query_budget(7)  # пользователь, ответственный, UPDATE, счётчики, свёртка, версия, NOTIFY
+async def bulk_update_deals(
+        data: DealBulkUpdate,
+        current_user: Principal = Depends(get_current_user),
+        service: DealServiceDep = None,
+):
+    logger.info('Массовое изменение сделок пользователем %s', current_user.id)
+
+    try:
+        return await service.bulk_update(data.ids, data.filter, data.patch, user_id=current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post('/events/ticket', response_model=DealEventsTicket)
+@query_budget(1)  # пользователь
+async def deal_events_ticket(current_user: Principal = Depends(get_current_user)):
+    """Билет на поток событий: EventSource не умеет передавать заголовки, а access-токен в URL попадает в логи"""
+    ticket = create_access_token(
+        {'sub': current_user.username, 'uid': current_user.id, 'scope': EVENTS_SCOPE},
+        timedelta(seconds=settings.DEAL_EVENTS_TICKET_SECONDS),
+    )
+    return DealEventsTicket(ticket=ticket, expires_in=settings.DEAL_EVENTS_TICKET_SECONDS)
+
+
+@router.get('/events')
+@query_budget(0)  # билет проверяется без БД
+async def deal_events_stream(
+        request: Request,
+        ticket: str = Query(..., description='Билет из POST /api/deals/events/ticket'),
+):
+    """Поток событий сделок (Server-Sent Events): created, updated, deleted, bulk"""
+    payload = check_ticket(ticket, EVENTS_SCOPE)
+    logger.info('Подписка на события сделок пользователя %s', payload['uid'])
+
+    async def stream():
+        async with deal_events.subscribe() as queue:
+            yield 'retry: 3000\n\n'
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.DEAL_EVENTS_PING_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                if event is None:
+                    # Подписчик отстал и отключён: клиент переподключится и перечитает список
+                    return
+                yield f'event: deal\ndata: {json.dumps(event, ensure_ascii=False)}\n\n'
+
+    return StreamingResponse(
+        stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@router.get('/export')
+@query_budget(2)
+async def export_deals(
+        format: Literal['ndjson', 'csv'] = Query('ndjson'),
+        status: Optional[DealStatus] = Query(None),
+        client_id: Optional[int] = Query(None),
+        assigned_to: Optional[int] = Query(None),
+        current_user: Principal = Depends(get_current_user),
+        service: DealServiceDep = None,
+):
+    logger.info('Выгрузка сделок (%s) пользователем %s', format, current_user.id)
+
+    chunks = service.stream_all(status=status, client_id=client_id, assigned_to=assigned_to)
+    return StreamingResponse(
+        encode_rows(chunks, format),
+        media_type=MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="deals.{format}"'},
+    )
+
+
 @router.get('/stats', response_model=DealStats)
+@query_budget(3)
 async def get_deal_stats(
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
         service: DealServiceDep = None,
 ):
-    logger.info(f'Запрос статистики от пользователя {current_user.id}')
+    logger.info('Запрос статистики от пользователя %s', current_user.id)
 
-    stats = await service.get_stats()
+    cache = get_cache()
+    version, _ = await service.get_version()
+    key = cache_key('deals:stats', version)
+    body = await cache.get(key)
+    if body is None:
+        stats = await service.get_stats()
+        body = DealStats(
+            total=stats['total'],
+            by_status=stats['by_status'],
+            won_amount=stats['won_amount'],
+            avg_check=stats['avg_check']
+        ).model_dump_json().encode('utf-8')
+        await cache.set(key, body, settings.CACHE_TTL_SECONDS, {'deals:all'})
 
-    return DealStats(
-        total=stats['total'],
-        by_status=stats['by_status'],
-        won_amount=stats['won_amount'],
-        average_check=0
-    )
+    return Response(body, media_type='application/json')
+
+
+@router.get('/cohort-funnel', response_model=DealCohortFunnel)
+@query_budget(2)  # пользователь, агрегат по свёртке
+async def get_cohort_funnel(
+        date_from: date = Query(..., description='Первый день создания сделок когорты'),
+        date_to: date = Query(..., description='Последний день включительно'),
+        assigned_to: Optional[int] = Query(None, ge=0, description='Ответственный, 0 - без ответственного'),
+        by_day: bool = Query(True, description='Строка на каждый день'),
+        by_manager: bool = Query(False, description='Строка на каждого ответственного'),
+        current_user: Principal = Depends(get_current_user),
+        service: DealAnalyticsServiceDep = None,
+):
+    logger.info('Запрос когортной воронки %s..%s от пользователя %s', date_from, date_to, current_user.id)
+
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='date_to раньше date_from'
+        )
+
+    rows = await service.cohort_funnel(date_from, date_to, assigned_to, by_day, by_manager)
+    return {'date_from': date_from, 'date_to': date_to, 'rows': rows}
 
 
 @router.get('/{deal_id}', response_model=DealResponse)
+@query_budget(3)
 async def get_deal(
         deal_id: int,
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
+        request: Request,
+        response: Response,
+        current_user: Principal = Depends(get_current_user),
         service: DealServiceDep = None
 ):
-    logger.info(f'Запрос сделки {deal_id} от пользователя {current_user.id}')
+    logger.info('Запрос сделки %s от пользователя %s', deal_id, current_user.id)
+
+    # Для условного запроса хватает updated_at, сделку целиком не загружаем
+    if has_conditional_headers(request):
+        updated_at = await service.get_updated_at(deal_id)
+        if updated_at is not None:
+            etag = make_etag('deal', deal_id, updated_at)
+            if is_not_modified(request, etag, updated_at):
+                return not_modified_response(etag, updated_at)
 
     deal = await service.get_by_id(deal_id)
 
@@ -90,17 +286,19 @@ async def get_deal(
             detail='Сделка не найдена'
         )
 
+    set_validators(response, make_etag('deal', deal.id, deal.updated_at), deal.updated_at)
     return deal
 
 
 @router.put('/{deal_id}', response_model=DealResponse)
+@query_budget(6)  # пользователь, UPDATE ... RETURNING, счётчики, свёртка, версия, NOTIFY
 async def update_deal(
         deal_id: int,
         deal_data: DealUpdate,
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
         service: DealServiceDep = None
 ):
-    logger.info(f'Обновление сделки {deal_id} пользователем {current_user.id}')
+    logger.info('Обновление сделки %s пользователем %s', deal_id, current_user.id)
 
 
     try:
@@ -112,7 +310,7 @@ async def update_deal(
                 detail='Сделка не найдена'
             )
 
-        logger.info(f'Сделка {deal_id} обновлена')
+        logger.info('Сделка %s обновлена', deal_id)
         return deal
 
     except ValueError as e:
@@ -122,12 +320,13 @@ async def update_deal(
         )
 
 @router.delete('/{deal_id}', status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(8)  # пользователь, сделка, её задачи (cascade), DELETE, счётчики, свёртка, версия, NOTIFY
 async def delete_deal(
         deal_id: int,
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
         service: DealServiceDep = None
 ):
-    logger.info(f'Удаление сделки {deal_id} пользователем {current_user.id}')
+    logger.info('Удаление сделки %s пользователем %s', deal_id, current_user.id)
 
     success = await service.delete(deal_id)
 
@@ -137,5 +336,5 @@ async def delete_deal(
             detail='Сделка не найдена'
         )
 
-    logger.info(f'Сделка {deal_id} удалена')
+    logger.info('Сделка %s удалена', deal_id)
     return None
\ No newline at end of file
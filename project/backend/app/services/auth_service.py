@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from models.user import User
 from dtos.auth import UserCreateDTO
-from utils.auth import hash_password, verify_password, create_access_token
+from utils.auth import hash_password_async, verify_password_async, create_access_token
 from datetime import timedelta
 from config import settings
 from typing import Optional
@@ -33,7 +33,7 @@ class AuthService:
         user = User(
             username=user_data.username,
             email=user_data.email,
-            hashed_password=hash_password(user_data.password),
+            hashed_password=await hash_password_async(user_data.password),
             full_name=user_data.full_name
         )
 
@@ -49,15 +49,18 @@ class AuthService:
         )
         user = result.scalar_one_or_none()
 
-        if not user or not verify_password(credentials.password, user.hashed_password):
+        if not user or not await verify_password_async(credentials.password, user.hashed_password):
             raise ValueError("Неверные учетные данные")
 
         if not user.is_active:
             raise ValueError("Пользователь неактивен")
 
         # Создание токена
+        claims = {"sub": user.username}
+        if settings.AUTH_CLAIMS_TOKENS:
+            claims.update(uid=user.id, role=user.role, tv=user.token_version)
         access_token = create_access_token(
-            data={"sub": user.username},
+            data=claims,
             expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
 
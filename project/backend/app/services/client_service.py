@@ -0,0 +1,61 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from database import get_read_db
+from models.client import Client
+from models.collection_version import CollectionVersion
+from utils.pagination import encode_cursor, decode_cursor
+from typing import Optional, Tuple
+from datetime import datetime
+
+
+class ClientService:
+
+    def __init__(self, db: AsyncSession = Depends(get_read_db)):
+        self.db = db
+
+    def _apply_search(self, query, search: Optional[str] = None):
+        if search:
+            pattern = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.where(Client.name.ilike(f'%{pattern}%', escape='\\'))
+        return query
+
+    async def get_all(
+            self,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            search: Optional[str] = None,
+            as_rows: bool = False
+    ) -> Tuple[list, Optional[str]]:
+        """Страница клиентов по возрастанию id.
+
+        Поиск по подстроке имени обслуживается триграммным индексом ix_clients_name_trgm.
+        С as_rows возвращаются строки (id, name) вместо ORM-объектов.
+        """
+        entity = select(Client.id, Client.name) if as_rows else select(Client)
+        query = self._apply_search(entity, search)
+
+        if cursor:
+            last_id, = decode_cursor(cursor, int)
+            query = query.where(Client.id > last_id)
+
+        query = query.order_by(Client.id).limit(limit + 1)
+        result = await self.db.execute(query)
+        clients = list(result.all() if as_rows else result.scalars().all())
+
+        next_cursor = None
+        if len(clients) > limit:
+            clients = clients[:limit]
+            next_cursor = encode_cursor(clients[-1].id)
+
+        return clients, next_cursor
+
+    async def get_version(self) -> Tuple[int, Optional[datetime]]:
+        """Версия коллекции клиентов и время её изменения (для ETag), растёт триггером на clients"""
+        result = await self.db.execute(
+            select(CollectionVersion.version, CollectionVersion.updated_at)
+            .where(CollectionVersion.name == Client.__tablename__)
+        )
+        row = result.one_or_none()
+        return (row.version, row.updated_at) if row else (0, None)
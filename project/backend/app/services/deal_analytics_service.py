@@ -0,0 +1,113 @@
+from fastapi import Depends
+from sqlalchemy import Date, delete, func, insert, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import get_db, get_read_db
+from dtos.deal import DealStatus
+from models.deal import Deal
+from models.deal_daily_stats import DealDailyStats
+from datetime import date, datetime, time, timedelta
+from typing import Annotated, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ключи свёртки по deals. Без bind-параметров, чтобы SELECT и GROUP BY совпадали текстуально
+DAY = func.date(Deal.created_at, type_=Date)
+MANAGER = func.coalesce(Deal.assigned_to, literal_column('0'))
+
+
+class DealAnalyticsService:
+    """Когортная воронка продаж по дням создания и менеджерам из свёртки deal_daily_stats"""
+
+    def __init__(
+            self,
+            db: AsyncSession = Depends(get_db),
+            read_db: Annotated[Optional[AsyncSession], Depends(get_read_db)] = None
+    ):
+        self.db = db
+        self.read_db = read_db if read_db is not None else db
+
+    async def cohort_funnel(
+            self,
+            date_from: date,
+            date_to: date,
+            assigned_to: Optional[int] = None,
+            by_day: bool = True,
+            by_manager: bool = False
+    ) -> list[dict]:
+        """Когорты сделок, созданных с date_from по date_to включительно, по их текущему статусу.
+
+        Сделка относится к дню создания, а не к дню выигрыша или проигрыша: конверсия
+        показывает, чем закончились сделки, заведённые в периоде.
+
+        При DEAL_DAILY_STATS_STORE читает свёртку (строк не больше, чем
+        дней x статусов x менеджеров), иначе группирует deals по индексу created_at.
+        """
+        if settings.DEAL_DAILY_STATS_STORE:
+            status, day, manager = DealDailyStats.status, DealDailyStats.day, DealDailyStats.assigned_to
+            query = (
+                select(status, func.sum(DealDailyStats.deals_count), func.sum(DealDailyStats.amount_sum))
+                .where(DealDailyStats.day >= date_from, DealDailyStats.day <= date_to)
+            )
+            if assigned_to is not None:
+                query = query.where(DealDailyStats.assigned_to == assigned_to)
+        else:
+            status, day, manager = Deal.status, DAY, MANAGER
+            query = (
+                select(status, func.count(Deal.id), func.sum(Deal.amount))
+                .where(
+                    Deal.created_at >= datetime.combine(date_from, time.min),
+                    Deal.created_at < datetime.combine(date_to + timedelta(days=1), time.min),
+                )
+            )
+            if assigned_to is not None:
+                query = query.where(MANAGER == assigned_to)
+
+        keys = ([day] if by_day else []) + ([manager] if by_manager else [])
+        query = query.add_columns(*keys).group_by(status, *keys)
+
+        rows = {}
+        for row_status, count, amount, *key in await self.read_db.execute(query):
+            row = rows.setdefault(tuple(key), {
+                'day': key[0] if by_day else None,
+                'assigned_to': key[-1] if by_manager else None,
+                'created': 0,
+                'by_status': {s.value: 0 for s in DealStatus},
+                'won_amount': 0.0,
+            })
+            status = DealStatus(row_status)
+            row['created'] += count
+            row['by_status'][status.value] += count
+            if status == DealStatus.WON:
+                row['won_amount'] += float(amount or 0)
+
+        return [row for _, row in sorted(rows.items(), key=lambda item: item[0])]
+
+    async def reconcile(self, since: Optional[date] = None) -> int:
+        """Пересчитать свёртку по deals начиная с дня since (по умолчанию целиком).
+
+        Таблица блокируется от записи на время пересчёта: изменения сделок,
+        не попавшие в снимок, применятся своими upsert после коммита.
+        """
+        connection = await self.db.connection()
+        if connection.dialect.name == 'postgresql':
+            await self.db.execute(text('LOCK TABLE deal_daily_stats IN EXCLUSIVE MODE'))
+
+        cleanup = delete(DealDailyStats)
+        source = select(DAY, Deal.status, MANAGER, func.count(Deal.id), func.sum(Deal.amount))
+        if since is not None:
+            cleanup = cleanup.where(DealDailyStats.day >= since)
+            source = source.where(Deal.created_at >= datetime.combine(since, time.min))
+        source = source.group_by(DAY, Deal.status, MANAGER)
+
+        await self.db.execute(cleanup)
+        result = await self.db.execute(
+            insert(DealDailyStats).from_select(
+                ['day', 'status', 'assigned_to', 'deals_count', 'amount_sum'], source
+            )
+        )
+        await self.db.commit()
+        logger.info('Свёртка deal_daily_stats пересчитана с %s: %s строк', since or 'начала', result.rowcount)
+        return result.rowcount
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import event, select, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+from dtos.deal import DealResponse
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'deal_events'
+
+# События транзакции сессии на БД без NOTIFY, публикуются после commit
+PENDING_KEY = 'deal_events_pending'
+
+
+def deal_event(event_type: str, deal=None, **extra) -> dict:
+    """Событие для подписчиков: created/updated с сделкой, deleted с id, bulk без данных"""
+    event = {'type': event_type, **extra}
+    if deal is not None:
+        event['deal'] = DealResponse.model_validate(deal, from_attributes=True).model_dump(mode='json')
+    return event
+
+
+class DealEventBroker:
+    """Раздача событий сделок подписчикам SSE этого воркера.
+
+    На PostgreSQL события уходят через NOTIFY в транзакции записи, и каждый
+    воркер, включая исходный, получает их своим LISTEN-соединением. На других
+    БД событие публикуется только локально и тоже только после commit. Медленный подписчик с переполненной
+    очередью отключается: клиент переподключится и перечитает список.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+        self._listener: Optional[asyncio.Task] = None
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.DEAL_EVENTS_ENABLED
+
+    def publish(self, event: dict) -> None:
+        self.published += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Отставшему подписчику вместо хвоста событий - сигнал переподключиться
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                self.dropped += 1
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        """Очередь событий; None в ней означает, что подписчик отключён за отставание"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    async def send(self, db: AsyncSession, events: list[dict]) -> None:
+        """Отправить события в транзакции db: NOTIFY доставится только после commit"""
+        if not self.enabled or not events:
+            return
+        connection = await db.connection()
+        if connection.dialect.name != 'postgresql':
+            db.info.setdefault(PENDING_KEY, []).extend(events)
+            return
+        for item in events:
+            await db.execute(select(func.pg_notify(CHANNEL, json.dumps(item, ensure_ascii=False))))
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            self.publish(json.loads(payload))
+        except ValueError:
+            logger.warning('Некорректное событие в канале %s', channel)
+
+    async def _listen(self, dsn: str) -> None:
+        import asyncpg
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(CHANNEL, self._on_notify)
+                logger.info('LISTEN %s запущен', CHANNEL)
+                await closed.wait()
+                logger.warning('Соединение LISTEN %s потеряно', CHANNEL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning('LISTEN %s не удался: %r', CHANNEL, e)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            # Пропущенные за время переподключения события клиенты догонят перечитыванием списка
+            self.publish({'type': 'bulk'})
+            await asyncio.sleep(settings.DEAL_EVENTS_RECONNECT_SECONDS)
+
+    async def start(self) -> None:
+        """Запустить LISTEN для PostgreSQL (на старте приложения)"""
+        url = make_url(settings.DATABASE_URL)
+        if not self.enabled or url.get_backend_name() != 'postgresql' or self._listener is not None:
+            return
+        dsn = url.set(drivername='postgresql').render_as_string(hide_password=False)
+        self._listener = asyncio.create_task(self._listen(dsn))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def stats(self) -> dict:
+        return {
+            'subscribers': len(self._subscribers),
+            'listening': self._listener is not None and not self._listener.done(),
+            'published': self.published,
+            'dropped': self.dropped,
+        }
+
+
+deal_events = DealEventBroker(queue_size=settings.DEAL_EVENTS_QUEUE_SIZE)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending(session: Session) -> None:
+    for item in session.info.pop(PENDING_KEY, []):
+        deal_events.publish(item)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
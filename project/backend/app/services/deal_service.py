@@ -1,22 +1,58 @@
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from pydantic import ValidationError
+from sqlalchemy import select, func, tuple_, update, insert, cast, Float
+from sqlalchemy.dialects import postgresql, sqlite
 
-from database import get_db
+from config import settings
+from database import get_db, get_read_db
 from models.deal import Deal
+from models.deal_stats import DealStatusStats
+from models.deal_daily_stats import DealDailyStats
+from models.collection_version import CollectionVersion
 from models.client import Client
 from models.user import User
-from dtos.deal import DealCreate, DealUpdate, DealStatus
-from typing import List, Optional, Tuple
+from dtos.deal import DealBulkFilter, DealBulkPatch, DealCreate, DealUpdate, DealStatus
+from services.deal_events import deal_event, deal_events
+from utils.background import job_queue
+from utils.cache import get_cache
+from utils.deal_export import EXPORT_COLUMNS
+from utils.metrics import count_batch
+from utils.pagination import encode_cursor, decode_cursor
+from typing import Annotated, AsyncIterator, List, Optional, Tuple
 from datetime import datetime
+from decimal import Decimal
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Колонки в порядке и типах DealResponse, для выдачи списка без ORM-объектов
+DEAL_ROW_COLUMNS = (
+    Deal.id,
+    Deal.title,
+    Deal.created_by,
+    cast(Deal.amount, Float).label('amount'),
+    Deal.status,
+    Deal.assigned_to,
+    Deal.created_at,
+    Deal.updated_at,
+    Deal.closed_at,
+)
+
+# Поля DealUpdate, которые пишутся в deals как есть
+UPDATABLE_FIELDS = ('title', 'client_id', 'amount', 'assigned_to')
+CLOSED_STATUSES = (DealStatus.WON, DealStatus.LOST)
+
 class DealService:
 
-    def __init__(self, db: AsyncSession = Depends(get_db)):
+    def __init__(
+            self,
+            db: AsyncSession = Depends(get_db),
+            read_db: Annotated[Optional[AsyncSession], Depends(get_read_db)] = None
+    ):
         self.db = db
+        # Реплика в GET-запросах; в остальных та же сессия, что и db
+        self.read_db = read_db if read_db is not None else db
 
     async def create(self, deal_data: DealCreate, created_by: int) -> Deal:
         client = await self.db.get(Client, deal_data.client_id)
@@ -40,99 +76,374 @@ class DealService:
         )
 
         self.db.add(deal)
-        await self.db.commit()
+        stats = {}
+        self._add_stats(stats, deal_data.status, 1, deal_data.amount)
+        await self._bump_stats(stats)
+        daily = {}
+        self._add_daily(daily, deal.created_at, deal_data.status, deal.assigned_to, 1, deal_data.amount)
+        await self._bump_daily(daily)
+        await self.db.flush()
         await self.db.refresh(deal)
+        await self._bump_version([deal_event('created', deal)])
+        await self.db.commit()
+        await self._invalidate_cache(
+            self.deal_cache_tags(deal.id, deal.client_id, deal.status, deal.assigned_to)
+        )
 
-        logger.info(f'Создана сделка {deal.id}: {deal.title}')
+        logger.info('Создана сделка %s: %s', deal.id, deal.title)
         return deal
 
+    async def get_updated_at(self, deal_id: int) -> Optional[datetime]:
+        """Время изменения сделки без загрузки ORM-объекта (для ETag)"""
+        result = await self.read_db.execute(
+            select(Deal.updated_at).where(Deal.id == deal_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_version(self) -> Tuple[int, Optional[datetime]]:
+        """Текущая версия коллекции сделок и время её изменения"""
+        result = await self.read_db.execute(
+            select(CollectionVersion.version, CollectionVersion.updated_at)
+            .where(CollectionVersion.name == Deal.__tablename__)
+        )
+        row = result.one_or_none()
+        return (row.version, row.updated_at) if row else (0, None)
+
+    @staticmethod
+    def deal_cache_tags(
+            deal_id: Optional[int],
+            client_id: Optional[int],
+            status,
+            assigned_to: Optional[int]
+    ) -> set[str]:
+        """Теги кэша, которые задевает изменение сделки с такими полями"""
+        tags = {'deals:all', f'client:{client_id}', f'status:{DealStatus(status).value}'}
+        if deal_id is not None:
+            tags.add(f'deal:{deal_id}')
+        if assigned_to:
+            tags.add(f'assignee:{assigned_to}')
+        return tags
+
+    @staticmethod
+    def list_cache_tags(
+            status: Optional[DealStatus] = None,
+            client_id: Optional[int] = None,
+            assigned_to: Optional[int] = None
+    ) -> set[str]:
+        """Теги закэшированного списка: сбрасывается изменением сделки, подходящей под любой фильтр"""
+        tags = set()
+        if status:
+            tags.add(f'status:{status.value}')
+        if client_id:
+            tags.add(f'client:{client_id}')
+        if assigned_to:
+            tags.add(f'assignee:{assigned_to}')
+        return tags or {'deals:all'}
+
+    async def _bump_version(self, events: list[dict]) -> None:
+        """Увеличить версию коллекции сделок и отправить события в транзакции изменения.
+
+        Вызывается последним перед commit: изменение, версия (ETag) и события
+        фиксируются вместе, а строка версии заблокирована только до commit.
+        """
+        await self.db.execute(
+            update(CollectionVersion)
+            .where(CollectionVersion.name == Deal.__tablename__)
+            .values(version=CollectionVersion.version + 1, updated_at=datetime.now())
+        )
+        await deal_events.send(self.db, events)
+
+    async def _invalidate_cache(self, tags: set[str]) -> None:
+        """Сбросить затронутые записи кэша после commit.
+
+        Ключи кэша содержат версию, поэтому сброс по тегам можно отложить до после ответа.
+        """
+        await job_queue.enqueue(get_cache().invalidate_tags, tags, name='cache_invalidate_tags')
+
     async def get_by_id(self, deal_id: int) -> Optional[Deal]:
-        result = await self.db.execute(
+        result = await self.read_db.execute(
             select(Deal).where(Deal.id == deal_id)
         )
         return result.scalar_one_or_none()
 
-    async def get_all(
+    def _apply_filters(
             self,
-            skip: int = 0,
-            limit: int = 100,
+            query,
             status: Optional[DealStatus] = None,
             client_id: Optional[int] = None,
             assigned_to: Optional[int] = None
-    ) -> Tuple[List[Deal], int]:
-        query = select(Deal)
-        count_query = select(func.count(Deal.id))
-
+    ):
         if status:
             query = query.where(Deal.status == status.value)
-            count_query = count_query.where(Deal.status == status.value)
 
         if client_id:
             query = query.where(Deal.client_id == client_id)
-            count_query = count_query.where(Deal.client_id == client_id)
 
         if assigned_to:
             query = query.where(Deal.assigned_to == assigned_to)
-            count_query = count_query.where(Deal.assigned_to == assigned_to)
 
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar() or 0
+        return query
+
+    async def get_all(
+            self,
+            skip: int = 0,
+            limit: int = 100,
+            status: Optional[DealStatus] = None,
+            client_id: Optional[int] = None,
+            assigned_to: Optional[int] = None,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
+            as_rows: bool = False
+    ) -> Tuple[list, Optional[int], Optional[str]]:
+        """Список сделок, новые первыми.
+
+        С cursor страница выбирается по ключу (created_at, id) без OFFSET,
+        поэтому стоимость не зависит от глубины. COUNT(*) выполняется
+        только при with_total=True. С as_rows возвращаются строки
+        DEAL_ROW_COLUMNS вместо ORM-объектов.
+        """
+        entity = select(*DEAL_ROW_COLUMNS) if as_rows else select(Deal)
+        query = self._apply_filters(entity, status, client_id, assigned_to)
+
+        total = None
+        if with_total:
+            count_query = self._apply_filters(
+                select(func.count(Deal.id)), status, client_id, assigned_to
+            )
+            total_result = await self.read_db.execute(count_query)
+            total = total_result.scalar() or 0
+
+        if cursor:
+            created_at, last_id = decode_cursor(cursor, datetime, int)
+            query = query.where(tuple_(Deal.created_at, Deal.id) < tuple_(created_at, last_id))
+        elif skip:
+            query = query.offset(skip)
+
+        # Берём на одну строку больше, чтобы понять, есть ли следующая страница
+        query = query.order_by(Deal.created_at.desc(), Deal.id.desc()).limit(limit + 1)
+        result = await self.read_db.execute(query)
+        deals = list(result.all() if as_rows else result.scalars().all())
+
+        next_cursor = None
+        if len(deals) > limit:
+            deals = deals[:limit]
+            next_cursor = encode_cursor(deals[-1].created_at, deals[-1].id)
 
-        query = query.offset(skip).limit(limit).order_by(Deal.created_at.desc())
-        result = await self.db.execute(query)
-        deals = list(result.scalars().all())
+        return deals, total, next_cursor
 
-        return deals, total
+    async def stream_all(
+            self,
+            status: Optional[DealStatus] = None,
+            client_id: Optional[int] = None,
+            assigned_to: Optional[int] = None,
+            chunk_size: int = 1000
+    ) -> AsyncIterator[list[dict]]:
+        """Все сделки по фильтрам пачками через серверный курсор.
+
+        Выбираются колонки, а не ORM-объекты, поэтому память не растёт
+        с размером выгрузки.
+        """
+        query = self._apply_filters(
+            select(*(getattr(Deal, column) for column in EXPORT_COLUMNS)),
+            status, client_id, assigned_to
+        ).order_by(Deal.id).execution_options(yield_per=chunk_size)
+
+        result = await self.read_db.stream(query)
+        async for partition in result.mappings().partitions():
+            yield partition
 
     async def update(
             self,
             deal_id: int,
             deal_data: DealUpdate,
             user_id: int
-    ) -> Optional[Deal]:
-
-        deal = await self.get_by_id(deal_id)
-        if not deal:
-            return None
+    ) -> Optional[dict]:
+        """Обновление одним UPDATE ... RETURNING.
 
+        Проверки клиента и ответственного и закрытие сделки выполняются внутри
+        запроса, старые значения для счётчиков и тегов кэша даёт _update_with_old.
+        """
         update_data = deal_data.model_dump(exclude_unset=True)
+        now = datetime.now()
+        values = {
+            field: value for field, value in update_data.items()
+            if field in UPDATABLE_FIELDS
+        }
+        values['updated_at'] = now
+
+        new_status = update_data.get('status')
+        if new_status is not None:
+            values['status'] = new_status
+            values['closed_at'] = (
+                func.coalesce(Deal.closed_at, now) if new_status in CLOSED_STATUSES else None
+            )
 
-        if 'client_id' in update_data and update_data['client_id'] != deal.client_id:
-            client = await self.db.get(Client, update_data['client_id'])
-            if not client:
-                raise ValueError(f'Клиент с ID {update_data["client_id"]} не найден')
+        conditions = []
+        if update_data.get('client_id') is not None:
+            conditions.append(select(Client.id).where(Client.id == update_data['client_id']).exists())
+        if update_data.get('assigned_to') is not None:
+            conditions.append(select(User.id).where(User.id == update_data['assigned_to']).exists())
 
-        if 'assigned_to' in update_data and update_data['assigned_to'] != deal.assigned_to:
-            if update_data['assigned_to']:
-                user = await self.db.get(User, update_data['assigned_to'])
-                if not user:
-                    raise ValueError(f'Пользователь с ID {update_data["assigned_to"]} не найден')
+        rows = await self._update_with_old(
+            select(Deal.id, Deal.client_id, Deal.status, Deal.amount, Deal.assigned_to, Deal.closed_at)
+            .where(Deal.id == deal_id),
+            values, conditions, Deal.__table__.c
+        )
+        row = rows[0] if rows else None
+        if row is None:
+            await self._check_update_failure(deal_id, update_data)
+            return None
 
-        if 'status' in update_data:
-            new_status = update_data['status']
+        old_status = DealStatus(row['old_status'])
+        status = DealStatus(row['status'])
+        if status in CLOSED_STATUSES and row['old_closed_at'] is None:
+            logger.info('Сделка %s закрыта со статусом %s', deal_id, status.value)
+        elif status not in CLOSED_STATUSES and row['old_closed_at'] is not None:
+            logger.info('Сделка %s возвращена в работу', deal_id)
+
+        if status != old_status or row['amount'] != row['old_amount']:
+            stats = {}
+            self._add_stats(stats, old_status, -1, row['old_amount'])
+            self._add_stats(stats, status, 1, row['amount'])
+            await self._bump_stats(stats)
+
+        if (status, row['amount'], row['assigned_to']) != (old_status, row['old_amount'], row['old_assigned_to']):
+            daily = {}
+            self._add_daily(daily, row['created_at'], old_status, row['old_assigned_to'], -1, row['old_amount'])
+            self._add_daily(daily, row['created_at'], status, row['assigned_to'], 1, row['amount'])
+            await self._bump_daily(daily)
+
+        deal = {key: value for key, value in row.items() if not key.startswith('old_')}
+        await self._bump_version([deal_event('updated', deal)])
+        await self.db.commit()
+        await self._invalidate_cache(
+            self.deal_cache_tags(deal_id, row['old_client_id'], old_status, row['old_assigned_to'])
+            | self.deal_cache_tags(deal_id, row['client_id'], status, row['assigned_to'])
+        )
 
-            if new_status in [DealStatus.WON, DealStatus.LOST] and deal.closed_at is None:
-                deal.closed_at = datetime.now()
-                logger.info(f'Сделка {deal_id} закрыта со статусом {new_status.value}')
+        logger.info('Сделка %s обновлена пользователем %s', deal_id, user_id)
+        return deal
+
+    async def _update_with_old(self, target, values: dict, conditions=(), returning=()) -> list[dict]:
+        """UPDATE deals по строкам target (select с Deal.id) со значениями до изменения.
+
+        Каждая строка - колонки returning плюс колонки target с префиксом old_.
+        На PostgreSQL это один запрос: target блокируется в CTE, которая видит
+        строки до изменения. В SQLite CTE внутри UPDATE видит уже изменённые
+        строки, поэтому старые значения читаются отдельным SELECT в той же
+        транзакции (запись в SQLite и так сериализована).
+        """
+        connection = await self.db.connection()
+        if connection.dialect.name == 'postgresql':
+            old = target.with_for_update().cte('old')
+            result = await self.db.execute(
+                update(Deal)
+                .where(Deal.id == old.c.id, *conditions)
+                .values(**values)
+                .returning(*returning, *(column.label(f'old_{column.name}') for column in old.c))
+                .execution_options(synchronize_session=False)
+            )
+            return [dict(row) for row in result.mappings()]
+
+        old_rows = {row['id']: row for row in (await self.db.execute(target)).mappings()}
+        if not old_rows:
+            return []
+        result = await self.db.execute(
+            update(Deal)
+            .where(Deal.id.in_(target.with_only_columns(Deal.id)), *conditions)
+            .values(**values)
+            .returning(*returning, Deal.id.label('old_id'))
+            .execution_options(synchronize_session=False)
+        )
+        return [
+            {**row, **{f'old_{name}': value for name, value in old_rows[row['old_id']].items()}}
+            for row in result.mappings()
+        ]
 
-            elif new_status not in [DealStatus.WON, DealStatus.LOST] and deal.closed_at is not None:
-                deal.closed_at = None
-                logger.info(f'Сделка {deal_id} возвращена в работу')
+    async def _check_update_failure(self, deal_id: int, update_data: dict) -> None:
+        """Причина, по которой UPDATE не затронул строк: ValueError или сделки нет"""
+        if await self.db.scalar(select(Deal.id).where(Deal.id == deal_id)) is None:
+            return
 
-            deal.status = new_status.value
-            del update_data['status']
+        client_id = update_data.get('client_id')
+        if client_id is not None and await self.db.get(Client, client_id) is None:
+            raise ValueError(f'Клиент с ID {client_id} не найден')
 
-        for field, value in update_data.items():
-            if hasattr(deal, field):
-                setattr(deal, field, value)
+        assigned_to = update_data.get('assigned_to')
+        if assigned_to is not None and await self.db.get(User, assigned_to) is None:
+            raise ValueError(f'Пользователь с ID {assigned_to} не найден')
 
-        deal.updated_at = datetime.now()
+    async def bulk_update(
+            self,
+            ids: Optional[List[int]],
+            filters: Optional[DealBulkFilter],
+            patch: DealBulkPatch,
+            user_id: int
+    ) -> dict:
+        """Смена статуса или ответственного у многих сделок одним UPDATE и одной транзакцией.
+
+        closed_at меняется так же, как в update. Старые значения из _update_with_old
+        идут на счётчики статусов и теги кэша.
+        """
+        values = patch.model_dump(exclude_unset=True)
+        if values.get('assigned_to') is not None and await self.db.get(User, values['assigned_to']) is None:
+            raise ValueError(f'Пользователь с ID {values["assigned_to"]} не найден')
+
+        now = datetime.now()
+        values['updated_at'] = now
+        new_status = values.get('status')
+        if new_status is not None:
+            values['closed_at'] = (
+                func.coalesce(Deal.closed_at, now) if new_status in CLOSED_STATUSES else None
+            )
 
+        target = select(Deal.id, Deal.client_id, Deal.status, Deal.amount, Deal.assigned_to, Deal.created_at)
+        if ids is not None:
+            target = target.where(Deal.id.in_(ids))
+        else:
+            target = self._apply_filters(target, filters.status, filters.client_id, filters.assigned_to)
+
+        tags = set()
+        daily = {}
+        old_totals: dict[DealStatus, list] = {}
+        for row in await self._update_with_old(target, values):
+            old_status = DealStatus(row['old_status'])
+            old_assigned_to = row['old_assigned_to']
+            self._add_daily(daily, row['old_created_at'], old_status, old_assigned_to, -1, row['old_amount'])
+            self._add_daily(
+                daily, row['old_created_at'], new_status or old_status,
+                values['assigned_to'] if 'assigned_to' in values else old_assigned_to, 1, row['old_amount']
+            )
+            tags |= self.deal_cache_tags(row['old_id'], row['old_client_id'], old_status, old_assigned_to)
+            if 'assigned_to' in values:
+                tags |= self.deal_cache_tags(
+                    None, row['old_client_id'], new_status or old_status, values['assigned_to']
+                )
+            totals = old_totals.setdefault(old_status, [0, Decimal(0)])
+            totals[0] += 1
+            totals[1] += row['old_amount']
+
+        if new_status is not None and old_totals:
+            tags.add(f'status:{new_status.value}')
+            stats = {}
+            for old_status, (count, amount) in old_totals.items():
+                self._add_stats(stats, old_status, -1, amount, count)
+                self._add_stats(stats, new_status, 1, amount, count)
+            await self._bump_stats(stats)
+        await self._bump_daily(daily)
+
+        updated = sum(count for count, _ in old_totals.values())
+        if updated:
+            await self._bump_version([deal_event('bulk', count=updated)])
         await self.db.commit()
-        await self.db.refresh(deal)
+        if tags:
+            await self._invalidate_cache(tags)
 
-        logger.info(f'Сделка {deal_id} обновлена пользователем {user_id}')
-        return deal
+        logger.info('Массово изменено %s сделок пользователем %s', updated, user_id)
+        return {
+            'updated': updated,
+            'by_status': {status.value: count for status, (count, _) in old_totals.items()},
+        }
 
     async def delete(self, deal_id: int) -> bool:
         deal = await self.get_by_id(deal_id)
@@ -140,28 +451,230 @@ class DealService:
             return False
 
         await self.db.delete(deal)
+        stats = {}
+        self._add_stats(stats, deal.status, -1, deal.amount)
+        await self._bump_stats(stats)
+        daily = {}
+        self._add_daily(daily, deal.created_at, deal.status, deal.assigned_to, -1, deal.amount)
+        await self._bump_daily(daily)
+        await self._bump_version([deal_event('deleted', id=deal_id)])
         await self.db.commit()
-        logger.info(f'Сделка {deal_id} удалена')
+        await self._invalidate_cache(
+            self.deal_cache_tags(deal.id, deal.client_id, deal.status, deal.assigned_to)
+        )
+        logger.info('Сделка %s удалена', deal_id)
         return True
 
-    async def get_stats(self) -> dict:
-        total_result = await self.db.execute(select(func.count(Deal.id)))
-        total = total_result.scalar() or 0
-
+    async def import_deals(
+            self,
+            rows: AsyncIterator[tuple[int, Optional[dict], Optional[str]]],
+            created_by: int
+    ) -> dict:
+        """Массовый импорт сделок пачками в одной транзакции.
+
+        Строки валидируются DealCreate, ссылки на клиентов и пользователей
+        проверяются одним запросом на пачку, ошибочные строки пропускаются
+        и попадают в отчёт.
+        """
+        result = {'inserted': 0, 'failed': 0, 'errors': []}
+        tags = set()
+
+        def add_error(row_no: int, error: str) -> None:
+            result['failed'] += 1
+            if len(result['errors']) < settings.DEAL_IMPORT_MAX_ERRORS:
+                result['errors'].append({'row': row_no, 'error': error})
+
+        batch = []
+        async for row_no, row, error in rows:
+            if error is not None:
+                add_error(row_no, error)
+                continue
+            try:
+                batch.append((row_no, DealCreate.model_validate(row)))
+            except ValidationError as e:
+                add_error(row_no, '; '.join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+
+            if len(batch) >= settings.DEAL_IMPORT_BATCH_SIZE:
+                result['inserted'] += await self._import_batch(batch, created_by, add_error, tags)
+                batch = []
+
+        if batch:
+            result['inserted'] += await self._import_batch(batch, created_by, add_error, tags)
+
+        if result['inserted']:
+            await self._bump_version([deal_event('bulk', count=result['inserted'])])
+        await self.db.commit()
+        if tags:
+            await self._invalidate_cache(tags)
+        logger.info('Импортировано сделок: %s, ошибок: %s', result['inserted'], result['failed'])
+        return result
+
+    async def _import_batch(self, batch: list, created_by: int, add_error, tags: set) -> int:
+        count_batch()
+        client_ids = {deal.client_id for _, deal in batch}
+        user_ids = {deal.assigned_to for _, deal in batch if deal.assigned_to}
+
+        existing_clients = set((await self.db.execute(
+            select(Client.id).where(Client.id.in_(client_ids))
+        )).scalars())
+        existing_users = set((await self.db.execute(
+            select(User.id).where(User.id.in_(user_ids))
+        )).scalars()) if user_ids else set()
+
+        now = datetime.now()
+        records = []
         stats = {}
-        for status in DealStatus:
-            result = await self.db.execute(
-                select(func.count(Deal.id)).where(Deal.status == status.value)
+        daily = {}
+        for row_no, deal in batch:
+            if deal.client_id not in existing_clients:
+                add_error(row_no, f'Клиент с ID {deal.client_id} не найден')
+                continue
+            if deal.assigned_to and deal.assigned_to not in existing_users:
+                add_error(row_no, f'Пользователь с ID {deal.assigned_to} не найден')
+                continue
+
+            amount = Decimal(str(deal.amount))
+            records.append({
+                'title': deal.title,
+                'client_id': deal.client_id,
+                'amount': amount,
+                'status': deal.status,
+                'assigned_to': deal.assigned_to,
+                'created_by': created_by,
+                'created_at': now,
+                'updated_at': now,
+            })
+            tags |= self.deal_cache_tags(None, deal.client_id, deal.status, deal.assigned_to)
+            self._add_stats(stats, deal.status, 1, amount)
+            self._add_daily(daily, now, deal.status, deal.assigned_to, 1, amount)
+
+        if not records:
+            return 0
+
+        connection = await self.db.connection()
+        if connection.dialect.driver == 'asyncpg':
+            # COPY в рамках текущей транзакции сессии; enum в БД хранится по имени
+            raw = await connection.get_raw_connection()
+            columns = list(records[0])
+            await raw.driver_connection.copy_records_to_table(
+                Deal.__tablename__,
+                columns=columns,
+                records=[
+                    tuple(r[c].name if c == 'status' else r[c] for c in columns)
+                    for r in records
+                ],
             )
-            stats[status.value] = result.scalar() or 0
+        else:
+            await self.db.execute(insert(Deal), records)
+
+        await self._bump_stats(stats)
+        await self._bump_daily(daily)
+
+        return len(records)
+
+    @staticmethod
+    def _add_stats(stats: dict, status, sign: int, amount, count: int = 1) -> None:
+        """Накопить изменение счётчиков статуса: добавить (sign=1) или убрать (sign=-1) count сделок"""
+        key = DealStatus(status)
+        deals_count, amount_sum = stats.get(key, (0, Decimal(0)))
+        stats[key] = (deals_count + sign * count, amount_sum + sign * Decimal(str(amount)))
+
+    async def _bump_stats(self, stats: dict) -> None:
+        """Применить накопленные изменения к deal_status_stats одним upsert.
+
+        Выполняется в той же транзакции, что и запись самих сделок. Статусы
+        сортируются, как ключи в _bump_daily, чтобы встречные смены статуса
+        (new -> won и won -> new) блокировали строки в одном порядке.
+        """
+        if not settings.DEAL_STATS_STORE:
+            return
+
+        rows = [
+            {'status': status, 'deals_count': count, 'amount_sum': amount_sum}
+            for status, (count, amount_sum) in sorted(stats.items())
+            if count or amount_sum
+        ]
+        if not rows:
+            return
+
+        connection = await self.db.connection()
+        dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+        stmt = dialect.insert(DealStatusStats).values(rows)
+        await self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[DealStatusStats.status],
+            set_={
+                'deals_count': DealStatusStats.deals_count + stmt.excluded.deals_count,
+                'amount_sum': DealStatusStats.amount_sum + stmt.excluded.amount_sum,
+            },
+        ))
+
+    @staticmethod
+    def _add_daily(daily: dict, created_at: datetime, status, assigned_to: Optional[int], sign: int, amount) -> None:
+        """Накопить изменение дневной свёртки для сделки, созданной в created_at"""
+        key = (created_at.date(), DealStatus(status), assigned_to or 0)
+        count, amount_sum = daily.get(key, (0, Decimal(0)))
+        daily[key] = (count + sign, amount_sum + sign * Decimal(str(amount)))
+
+    async def _bump_daily(self, daily: dict) -> None:
+        """Применить накопленные изменения к deal_daily_stats одним upsert.
+
+        Ключи сортируются, чтобы параллельные транзакции брали блокировки строк в одном порядке.
+        """
+        if not settings.DEAL_DAILY_STATS_STORE:
+            return
+
+        rows = [
+            {'day': day, 'status': status, 'assigned_to': assigned_to,
+             'deals_count': count, 'amount_sum': amount_sum}
+            for (day, status, assigned_to), (count, amount_sum) in sorted(daily.items())
+            if count or amount_sum
+        ]
+        if not rows:
+            return
+
+        connection = await self.db.connection()
+        dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+        stmt = dialect.insert(DealDailyStats).values(rows)
+        await self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[DealDailyStats.day, DealDailyStats.status, DealDailyStats.assigned_to],
+            set_={
+                'deals_count': DealDailyStats.deals_count + stmt.excluded.deals_count,
+                'amount_sum': DealDailyStats.amount_sum + stmt.excluded.amount_sum,
+            },
+        ))
 
-        won_result = await self.db.execute(
-            select(func.sum(Deal.amount)).where(Deal.status == DealStatus.WON.value)
-        )
-        won_amount = float(won_result.scalar() or 0)
+    async def get_stats(self) -> dict:
+        """Статистика по сделкам одним запросом.
+
+        При DEAL_STATS_STORE читает готовые счётчики (по строке на статус),
+        иначе считает один сгруппированный агрегат по deals.
+        """
+        if settings.DEAL_STATS_STORE:
+            query = select(
+                DealStatusStats.status,
+                DealStatusStats.deals_count,
+                DealStatusStats.amount_sum
+            )
+        else:
+            query = select(
+                Deal.status,
+                func.count(Deal.id),
+                func.coalesce(func.sum(Deal.amount), 0)
+            ).group_by(Deal.status)
+
+        result = await self.read_db.execute(query)
+        rows = {DealStatus(status): (count, amount) for status, count, amount in result.all()}
+
+        stats = {status.value: int(rows.get(status, (0, 0))[0]) for status in DealStatus}
+        won_count, won_amount = rows.get(DealStatus.WON, (0, 0))
+        won_amount = float(won_amount or 0)
 
         return {
-            'total': total,
+            'total': sum(stats.values()),
             'by_status': stats,
-            'won_amount': won_amount
-        }
\ No newline at end of file
+            'won_amount': won_amount,
+            'avg_check': won_amount / won_count if won_count else 0.0
+        }
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from config import settings
+from models.user import User
+
+# Имена изменённых пользователей в транзакции сессии, сбрасываются из кэша после commit
+PENDING_KEY = 'principal_cache_pending'
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Данные текущего пользователя, достаточные для авторизации и /me.
+
+    Из токена с claims известны только id, username и роль, email там None.
+    """
+    id: int
+    username: str
+    email: Optional[str]
+    full_name: Optional[str]
+    role: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> 'Principal':
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            is_active=user.is_active,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> 'Principal':
+        return cls(
+            id=payload['uid'],
+            username=payload['sub'],
+            email=None,
+            full_name=None,
+            role=payload['role'],
+            is_active=True,
+        )
+
+    @property
+    def is_complete(self) -> bool:
+        return self.email is not None
+
+
+class PrincipalCache:
+    """TTL/LRU-кэш пользователей по username в пределах одного воркера"""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._items: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Растёт при каждом сбросе: пользователь, прочитанный до сброса, в кэш не попадёт
+        self._generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, username: str) -> Optional[Principal]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._items.get(username)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._items[username]
+                self.misses += 1
+                return None
+            self._items.move_to_end(username)
+            self.hits += 1
+            return item[1]
+
+    @property
+    def generation(self) -> int:
+        """Запомнить до чтения пользователя из БД и передать в set"""
+        return self._generation
+
+    def set(self, principal: Principal, generation: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                # Пока читали, пользователей меняли: прочитанное могло устареть
+                return
+            self._items[principal.username] = (time.monotonic() + self.ttl_seconds, principal)
+            self._items.move_to_end(principal.username)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, username: str) -> None:
+        """Сбросить пользователя после изменения или деактивации"""
+        with self._lock:
+            self._generation += 1
+            if self._items.pop(username, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._items),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _note_changed_user(mapper, connection, target: User) -> None:
+    """Любое изменение пользователя через ORM сбрасывает его из кэша этого воркера после commit.
+
+    Остальные воркеры увидят изменение не позже чем через TTL.
+    """
+    session = object_session(target)
+    if session is None:
+        return
+    pending = session.info.setdefault(PENDING_KEY, set())
+    pending.add(target.username)
+    pending.update(inspect(target).attrs.username.history.deleted)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_pending(session: Session) -> None:
+    for username in session.info.pop(PENDING_KEY, ()):
+        principal_cache.invalidate(username)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
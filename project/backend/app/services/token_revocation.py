@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from config import settings
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Изменение этих полей делает выданные токены с claims недействительными
+REVOKING_FIELDS = ('hashed_password', 'role', 'is_active')
+
+# Изменения пользователей в транзакции сессии, применяются к списку после commit
+PENDING_KEY = 'token_revocation_pending'
+
+
+class TokenRevocationList:
+    """Список отозванных токенов с claims в пределах одного воркера.
+
+    Хранит только пользователей с token_version > 0 или неактивных, поэтому
+    перечитывается одним небольшим запросом раз в refresh_seconds.
+    Пользователей деактивируют, а не удаляют: удаление через ORM отзывает
+    токены только в этом воркере, перечитывание удалённого не увидит.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions: dict[int, int] = {}
+        self._inactive: set[int] = set()
+        self._deleted: set[int] = set()
+        self._loaded_at: float | None = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    async def refresh_if_stale(self, db: AsyncSession) -> None:
+        # Соседние запросы не ждут перечитывания и проверяют по текущему списку
+        if self._refreshing or not self.is_stale():
+            return
+        self._refreshing = True
+        try:
+            result = await db.execute(
+                select(User.id, User.token_version, User.is_active).where(
+                    or_(User.token_version > 0, User.is_active.isnot(True))
+                )
+            )
+            versions, inactive = {}, set()
+            for user_id, token_version, is_active in result:
+                versions[user_id] = token_version
+                if not is_active:
+                    inactive.add(user_id)
+        except Exception as e:
+            # Без загруженного списка проверять нечем; иначе работаем по прежнему,
+            # а следующий запрос попробует перечитать снова
+            self.failures += 1
+            if self._loaded_at is None:
+                raise
+            logger.warning('Не удалось перечитать список отзыва токенов: %r', e)
+            # Транзакция запроса ещё пуста, откат нужен, чтобы сессией можно было пользоваться
+            await db.rollback()
+            return
+        finally:
+            self._refreshing = False
+
+        with self._lock:
+            self._versions = versions
+            self._inactive = inactive
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def is_revoked(self, user_id: int, token_version: int) -> bool:
+        with self._lock:
+            revoked = (
+                user_id in self._inactive
+                or token_version < self._versions.get(user_id, 0)
+                or user_id in self._deleted
+            )
+            if revoked:
+                self.rejected += 1
+            return revoked
+
+    def note(self, user_id: int, token_version: int, is_active: bool) -> None:
+        """Применить изменение пользователя, сделанное в этом воркере, не дожидаясь перечитывания"""
+        with self._lock:
+            self._versions[user_id] = token_version
+            if is_active:
+                self._inactive.discard(user_id)
+            else:
+                self._inactive.add(user_id)
+
+    def note_deleted(self, user_id: int) -> None:
+        with self._lock:
+            self._deleted.add(user_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'versions': len(self._versions),
+                'inactive': len(self._inactive),
+                'deleted': len(self._deleted),
+                'refreshes': self.refreshes,
+                'failures': self.failures,
+                'rejected': self.rejected,
+            }
+
+
+token_revocation = TokenRevocationList(refresh_seconds=settings.TOKEN_REVOCATION_REFRESH_SECONDS)
+
+
+@event.listens_for(User, 'before_update')
+def _bump_token_version(mapper, connection, target: User) -> None:
+    """Смена пароля, роли или деактивация отзывает ранее выданные токены"""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in REVOKING_FIELDS):
+        target.token_version = (target.token_version or 0) + 1
+
+
+@event.listens_for(User, 'after_update')
+def _note_token_version(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, {})[target.id] = (
+            target.token_version or 0, bool(target.is_active)
+        )
+
+
+@event.listens_for(User, 'after_delete')
+def _note_deleted(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, {})[target.id] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_pending(session: Session) -> None:
+    """Изменения пользователей попадают в список только после commit: откат их не оставит"""
+    for user_id, change in session.info.pop(PENDING_KEY, {}).items():
+        if change is None:
+            token_revocation.note_deleted(user_id)
+        else:
+            token_revocation.note(user_id, *change)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
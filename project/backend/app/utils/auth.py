@@ -1,11 +1,35 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from config import settings
 from jose import jwt
+from jose.exceptions import ExpiredSignatureError
 import bcrypt
 
 SALT_ROUNDS = 12
 
+# bcrypt отпускает GIL, поэтому хэширование в потоках не блокирует event loop.
+# Размер пула ограничивает число одновременных хэширований на воркер,
+# остальные запросы ждут в очереди пула.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix='bcrypt',
+)
+_hash_stats_lock = threading.Lock()
+_hash_stats = {
+    'submitted': 0,
+    'completed': 0,
+    'in_progress': 0,
+    'wait_seconds_total': 0.0,
+    'wait_seconds_max': 0.0,
+    'run_seconds_total': 0.0,
+}
+
 def hash_password(password: str) -> str:
     """Хэширование пароля"""
     password_bytes = password.encode('utf-8')
@@ -21,6 +45,51 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
 
+def _run_timed(func, submitted_at: float, *args):
+    """Выполнение функции в пуле с учётом времени ожидания в очереди"""
+    started_at = time.perf_counter()
+    wait = started_at - submitted_at
+    with _hash_stats_lock:
+        _hash_stats['in_progress'] += 1
+        _hash_stats['wait_seconds_total'] += wait
+        _hash_stats['wait_seconds_max'] = max(_hash_stats['wait_seconds_max'], wait)
+    try:
+        return func(*args)
+    finally:
+        with _hash_stats_lock:
+            _hash_stats['in_progress'] -= 1
+            _hash_stats['completed'] += 1
+            _hash_stats['run_seconds_total'] += time.perf_counter() - started_at
+
+
+async def _run_in_hash_pool(func, *args):
+    with _hash_stats_lock:
+        _hash_stats['submitted'] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, _run_timed, func, time.perf_counter(), *args
+    )
+
+
+async def hash_password_async(password: str) -> str:
+    """Хэширование пароля вне event loop"""
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Проверка пароля вне event loop"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+def get_password_hasher_stats() -> dict:
+    """Метрики пула хэширования: очередь, ожидание и время работы"""
+    with _hash_stats_lock:
+        stats = dict(_hash_stats)
+    stats['workers'] = settings.PASSWORD_HASH_WORKERS
+    stats['queued'] = stats['submitted'] - stats['completed'] - stats['in_progress']
+    return stats
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Создание JWT токена"""
     to_encode = data.copy()
@@ -29,6 +98,81 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
+class VerifiedTokenCache:
+    """LRU проверенных токенов: дайджест токена -> (exp, payload).
+
+    Подпись и срок действия токена не меняются, поэтому проверенный payload
+    можно переиспользовать до exp. Сами токены в памяти не хранятся.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, key: bytes) -> dict | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            if item[0] <= time.time():
+                del self._items[key]
+                self.expired += 1
+                raise ExpiredSignatureError('Signature has expired.')
+            self._items.move_to_end(key)
+            self.hits += 1
+            return dict(item[1])
+
+    def set(self, key: bytes, payload: dict) -> None:
+        exp = payload.get('exp')
+        if not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            self._items[key] = (exp, dict(payload))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._items),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+
+
 def decode_token(token: str) -> dict:
-    """Расшифровка токена"""
-    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    """Расшифровка токена, повторные запросы с тем же токеном берутся из кэша"""
+    if token_cache.max_size <= 0:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    key = token_cache.digest(token)
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_cache.set(key, payload)
+    return payload
+
+
+def get_token_cache_stats() -> dict:
+    """Метрики кэша проверенных токенов"""
+    return token_cache.stats()
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from config import settings
+from utils.metrics import JOB_DURATION, JOB_QUEUE_DEPTH, JOB_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    args: tuple
+    kwargs: dict
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class JobQueue:
+    """Очередь побочных действий после commit, выполняемых воркерами в этом процессе.
+
+    Очередь ограничена: когда она заполнена или не запущена (скрипты, остановка
+    приложения), задача выполняется сразу в вызывающем коде, а не теряется.
+    Упавшая задача повторяется с экспоненциальной задержкой.
+    """
+
+    def __init__(self, max_size: int, workers: int, max_retries: int, retry_delay: float):
+        self.max_size = max_size
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        # Идёт drain: очередь ещё разбирается, но новые задачи выполняются сразу
+        self._stopping = False
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.inline = 0
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None and not self._stopping
+
+    async def enqueue(self, func: Callable[..., Awaitable[Any]], *args, name: Optional[str] = None, **kwargs) -> None:
+        """Поставить корутинную функцию в очередь; ответ на запрос её не ждёт"""
+        job = Job(name or func.__qualname__, func, args, kwargs)
+        if self.running:
+            try:
+                self._queue.put_nowait(job)
+                JOB_QUEUE_DEPTH.inc()
+                return
+            except asyncio.QueueFull:
+                logger.warning('Очередь фоновых задач заполнена, %s выполняется сразу', job.name)
+        self.inline += 1
+        await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        JOB_WAIT.labels(job.name).observe(time.perf_counter() - job.enqueued_at)
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                await job.func(*job.args, **job.kwargs)
+            except Exception:
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    JOB_DURATION.labels(job.name, 'failed').observe(time.perf_counter() - started)
+                    logger.exception('Фоновая задача %s не выполнена после %s попыток', job.name, attempt + 1)
+                    return
+                self.retried += 1
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            else:
+                self.completed += 1
+                JOB_DURATION.labels(job.name, 'ok').observe(time.perf_counter() - started)
+                return
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        # Своя ссылка на очередь: drain разбирает её до конца, не трогая self._queue
+        while True:
+            job = await queue.get()
+            JOB_QUEUE_DEPTH.dec()
+            try:
+                await self._run(job)
+            finally:
+                queue.task_done()
+
+    def start(self) -> None:
+        """Запустить воркеры (на старте приложения)"""
+        if self._queue is not None or self.workers <= 0:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(self._queue), name=f'background-job-{i}')
+            for i in range(self.workers)
+        ]
+
+    async def drain(self, timeout: float) -> None:
+        """Дождаться уже поставленных задач и остановить воркеры (при остановке приложения).
+
+        Новые задачи с этого момента выполняются сразу в вызывающем коде.
+        """
+        if not self.running:
+            return
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning('Не дождались %s фоновых задач при остановке', self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._stopping = False
+
+    def stats(self) -> dict:
+        return {
+            'running': self.running,
+            'depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_size': self.max_size,
+            'completed': self.completed,
+            'failed': self.failed,
+            'retried': self.retried,
+            'inline': self.inline,
+        }
+
+
+job_queue = JobQueue(
+    max_size=settings.JOB_QUEUE_MAX_SIZE,
+    workers=settings.JOB_QUEUE_WORKERS,
+    max_retries=settings.JOB_QUEUE_MAX_RETRIES,
+    retry_delay=settings.JOB_QUEUE_RETRY_DELAY,
+)
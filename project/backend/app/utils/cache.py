@@ -0,0 +1,160 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from config import settings
+
+
+class MemoryCacheBackend:
+    """LRU-кэш в памяти воркера с TTL и инвалидацией по тегам"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items: OrderedDict[str, tuple[float, bytes, frozenset]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._items.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                self._delete(key)
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        if key in self._items:
+            self._delete(key)
+        tags = frozenset(tags)
+        self._items[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._items) > self.max_entries:
+            self._delete(next(iter(self._items)))
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                self._delete(key)
+
+    def _delete(self, key: str) -> None:
+        _, _, tags = self._items.pop(key, (None, None, ()))
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'backend': 'memory',
+            'size': len(self._items),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class RedisCacheBackend:
+    """Общий для всех воркеров кэш в Redis (или любом сервере с протоколом Redis).
+
+    Используются только GET/SET/SADD/SMEMBERS/EXPIRE/DEL. Требует пакет redis,
+    он не входит в requirements.txt и ставится отдельно.
+    """
+
+    TAG_PREFIX = 'cache-tag:'
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError('Для CACHE_BACKEND=redis установите пакет redis') from e
+        self._redis = redis.from_url(url)
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._redis.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        ttl = max(1, int(ttl))
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(key, value, ex=ttl)
+            for tag in tags:
+                pipe.sadd(self.TAG_PREFIX + tag, key)
+                pipe.expire(self.TAG_PREFIX + tag, ttl)
+            await pipe.execute()
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            keys = await self._redis.smembers(self.TAG_PREFIX + tag)
+            await self._redis.delete(self.TAG_PREFIX + tag, *keys)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'backend': 'redis',
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class NullCacheBackend:
+    """Кэш выключен"""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        pass
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {'backend': 'none'}
+
+
+_cache = None
+
+
+def get_cache():
+    """Кэш ответов, выбранный в CACHE_BACKEND (memory, redis или none)"""
+    global _cache
+    if _cache is None:
+        if settings.CACHE_BACKEND == 'redis':
+            _cache = RedisCacheBackend(settings.CACHE_URL)
+        elif settings.CACHE_BACKEND == 'memory':
+            _cache = MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+        else:
+            _cache = NullCacheBackend()
+    return _cache
+
+
+def cache_key(namespace: str, *parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return f'{namespace}:{digest}'
+
+
+def pack_response(body: bytes, headers: dict) -> bytes:
+    """Тело ответа вместе с заголовками, которые нужно отдать из кэша"""
+    return json.dumps(headers).encode('utf-8') + b'\n' + body
+
+
+def unpack_response(value: bytes) -> tuple[bytes, dict]:
+    headers, body = value.split(b'\n', 1)
+    return body, json.loads(headers)
@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+EXPORT_COLUMNS = [
+    'id', 'title', 'client_id', 'amount', 'status', 'created_by',
+    'assigned_to', 'created_at', 'updated_at', 'closed_at',
+]
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _to_wire(row: dict) -> dict:
+    """Значения строки сделки в виде, пригодном для JSON/CSV"""
+    values = dict(row)
+    values['amount'] = float(values['amount'])
+    values['status'] = values['status'].value
+    for field in ('created_at', 'updated_at', 'closed_at'):
+        if values[field] is not None:
+            values[field] = values[field].isoformat()
+    return values
+
+
+async def encode_rows(chunks: AsyncIterator[list[dict]], fmt: str) -> AsyncIterator[bytes]:
+    """Кодирование пачек строк в NDJSON или CSV по мере поступления из курсора"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        yield buffer.getvalue().encode('utf-8')
+        async for chunk in chunks:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(_to_wire(row) for row in chunk)
+            yield buffer.getvalue().encode('utf-8')
+    else:
+        async for chunk in chunks:
+            yield ''.join(
+                json.dumps(_to_wire(row), ensure_ascii=False) + '\n' for row in chunk
+            ).encode('utf-8')
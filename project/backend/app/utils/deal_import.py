@@ -0,0 +1,132 @@
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from fastapi import UploadFile
+
+CHUNK_SIZE = 64 * 1024
+
+
+async def _iter_lines(file: UploadFile) -> AsyncIterator[bytes]:
+    """Построчное чтение загруженного файла без загрузки его целиком в память"""
+    buffer = b''
+    while chunk := await file.read(CHUNK_SIZE):
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+class _PendingLines:
+    """Источник строк для csv.reader, пополняемый по мере чтения загрузки"""
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _iter_csv_rows(file: UploadFile) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Записи CSV через один csv.reader: поле в кавычках может содержать перевод строки.
+
+    Физические строки копятся, пока число кавычек в записи нечётное (запись не
+    закончена), и отдаются reader целиком, поэтому он никогда не ждёт данных
+    посреди записи. Номер строки - reader.line_num, последняя строка записи.
+    """
+    source = _PendingLines()
+    reader = csv.reader(source)
+    header = None
+    record: list[str] = []
+    quotes = 0
+    first = True
+
+    async for raw in _iter_lines(file):
+        try:
+            line = raw.decode('utf-8-sig' if first else 'utf-8').rstrip('\r')
+        except UnicodeDecodeError:
+            # Недекодируемая строка отбрасывает и незаконченную запись, в которую попала;
+            # reader получает вместо них пустые строки, чтобы line_num не отстал
+            source.lines.extend('\n' for _ in range(len(record) + 1))
+            record.clear()
+            quotes = 0
+            while source.lines:
+                next(reader, None)
+            yield reader.line_num, None, 'Строка не в кодировке UTF-8'
+            continue
+        finally:
+            first = False
+
+        record.append(line + '\n')
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+
+        source.lines.extend(record)
+        record.clear()
+        try:
+            values = next(reader, [])
+        except csv.Error as e:
+            source.lines.clear()
+            yield reader.line_num, None, f'Некорректный CSV: {e}'
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield reader.line_num, None, f'Ожидалось {len(header)} колонок, получено {len(values)}'
+            continue
+        # Пустые ячейки CSV означают отсутствие значения
+        yield reader.line_num, {k: v for k, v in zip(header, values) if v != ''}, None
+
+    if record:
+        line_no = reader.line_num + len(record)
+        record.clear()
+        yield line_no, None, 'Незакрытая кавычка в конце файла'
+
+
+async def iter_import_rows(
+        file: UploadFile,
+        fmt: str
+) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Строки файла импорта: (номер строки, данные или None, ошибка разбора или None).
+
+    fmt - 'ndjson' (объект JSON на строку) или 'csv' (первая строка - заголовок,
+    поля в кавычках могут занимать несколько строк).
+    """
+    if fmt == 'csv':
+        async for item in _iter_csv_rows(file):
+            yield item
+        return
+
+    line_no = 0
+    async for raw in _iter_lines(file):
+        line_no += 1
+        try:
+            line = raw.decode('utf-8-sig' if line_no == 1 else 'utf-8').rstrip('\r')
+        except UnicodeDecodeError:
+            yield line_no, None, 'Строка не в кодировке UTF-8'
+            continue
+        if not line.strip():
+            continue
+
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f'Некорректный JSON: {e.msg}'
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, 'Ожидался JSON-объект'
+            continue
+        yield line_no, row, None
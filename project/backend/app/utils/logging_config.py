@@ -0,0 +1,159 @@
+import json
+import logging
+import queue
+import sys
+import uuid
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from config import settings
+
+REQUEST_ID_HEADER = b'x-request-id'
+
+request_id_var: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+_listener: Optional[QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Добавляет в запись request_id текущего запроса (выполняется в потоке, который логирует)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю записей ниже WARNING от шумных логгеров.
+
+    Решение принимается по request_id, поэтому у попавшего в выборку запроса
+    видны все строки, а не случайные.
+    """
+
+    def __init__(self, loggers: list[str], rate: float):
+        super().__init__()
+        self.prefixes = tuple(loggers)
+        self.threshold = int(rate * 10000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not record.name.startswith(self.prefixes):
+            return True
+        key = getattr(record, 'request_id', None) or f'{record.thread}:{record.created}'
+        return zlib.crc32(key.encode()) % 10000 < self.threshold
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            data['request_id'] = record.request_id
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler, который не форматирует запись в event loop и не блокируется.
+
+    Форматирование и запись в поток вывода делает QueueListener в своём потоке.
+    При переполненной очереди запись отбрасывается и считается.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # msg/args и exc_info остаются как есть: getMessage и форматирование исключения
+        # выполняет QueueListener. Очередь в памяти процесса, запись не сериализуется,
+        # поэтому чистить непиклуемые поля не нужно. Запись не копируется - других
+        # обработчиков у корневого логгера нет
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def setup_logging() -> None:
+    """Корневой логгер пишет через очередь: в event loop остаются только фильтры и put_nowait"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+        ))
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    handler.addFilter(RequestContextFilter())
+    if settings.LOG_SAMPLE_RATE < 1 and settings.LOG_SAMPLED_LOGGERS:
+        handler.addFilter(SamplingFilter(settings.LOG_SAMPLED_LOGGERS, settings.LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL)
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Дописать оставшиеся в очереди записи и остановить поток (при остановке приложения)"""
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except queue.Full:
+            # Поток-слушатель демон и завершится вместе с процессом
+            pass
+        _listener = None
+
+
+def get_logging_stats() -> dict:
+    return {
+        'queued': _listener.queue.qsize() if _listener is not None else 0,
+        'dropped': DroppingQueueHandler.dropped,
+    }
+
+
+class RequestIdMiddleware:
+    """ASGI middleware: request id из X-Request-ID или новый, в контексте логов и в ответе"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope['headers']).get(REQUEST_ID_HEADER, b'').decode('latin-1')[:64]
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = [
+                    *message.get('headers', []), (REQUEST_ID_HEADER, request_id.encode('latin-1'))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,155 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+from config import settings
+from utils.query_budget import QueryBudgetExceeded, check_query_budget
+
+logger = logging.getLogger(__name__)
+
+# При нескольких воркерах uvicorn метрики пишутся в PROMETHEUS_MULTIPROC_DIR
+# и суммируются по всем процессам при отдаче /metrics
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Время обработки запроса',
+    ['method', 'route', 'status'],
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    'http_request_db_statements', 'Число SQL-запросов на HTTP-запрос',
+    ['method', 'route'],
+    buckets=(0, 1, 2, 3, 4, 5, 7, 10, 15, 25, 50, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_seconds', 'Суммарное время SQL-запросов на HTTP-запрос',
+    ['method', 'route'],
+)
+DB_STATEMENTS = Counter(
+    'db_statements_total', 'Все SQL-запросы, в том числе вне HTTP-запросов',
+)
+JOB_QUEUE_DEPTH = Gauge(
+    'background_job_queue_depth', 'Задачи в очереди фоновых задач',
+    multiprocess_mode='livesum',
+)
+JOB_DURATION = Histogram(
+    'background_job_duration_seconds', 'Время выполнения фоновой задачи, включая повторы',
+    ['job', 'outcome'],
+)
+JOB_WAIT = Histogram(
+    'background_job_wait_seconds', 'Время ожидания фоновой задачи в очереди',
+    ['job'],
+)
+
+
+class RequestDbStats:
+    """SQL-запросы, выполненные в рамках одного HTTP-запроса"""
+
+    __slots__ = ('statements', 'seconds', 'sql', 'batches')
+
+    def __init__(self, keep_sql: bool = False):
+        self.statements = 0
+        self.seconds = 0.0
+        # Пачки маршрутов с бюджетом на пачку (query_budget per_batch)
+        self.batches = 0
+        # Тексты запросов нужны только для проверки бюджета
+        self.sql: Optional[list[str]] = [] if keep_sql else None
+
+
+_request_db: ContextVar[Optional[RequestDbStats]] = ContextVar('request_db', default=None)
+
+
+def current_request_db() -> Optional[RequestDbStats]:
+    return _request_db.get()
+
+
+def count_batch() -> None:
+    """Отметить обработанную пачку: бюджет маршрута растёт на per_batch"""
+    stats = _request_db.get()
+    if stats is not None:
+        stats.batches += 1
+
+
+def instrument_engine(engine) -> None:
+    """Подсчёт запросов и времени БД через события движка SQLAlchemy.
+
+    SQLAlchemy переносит контекст asyncio-задачи в свой greenlet,
+    поэтому события видят RequestDbStats текущего запроса.
+    """
+    sync_engine = getattr(engine, 'sync_engine', engine)
+    # create_app() может вызываться несколько раз в одном процессе (тесты, бенчмарки)
+    if getattr(sync_engine, '_crm_instrumented', False):
+        return
+    sync_engine._crm_instrumented = True
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        DB_STATEMENTS.inc()
+        stats = _request_db.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += elapsed
+            if stats.sql is not None:
+                stats.sql.append(statement)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: латентность, статус и нагрузка на БД по шаблону маршрута"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats(keep_sql=settings.QUERY_BUDGET_MODE == 'warn')
+        token = _request_db.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_db.reset(token)
+            # Шаблон пути (/api/deals/{deal_id}), а не сам путь, чтобы не плодить серии
+            route = scope.get('route')
+            route_path = getattr(route, 'path', None) or 'unmatched'
+            method = scope['method']
+            REQUEST_LATENCY.labels(method, route_path, str(status_code)).observe(elapsed)
+            REQUEST_DB_STATEMENTS.labels(method, route_path).observe(stats.statements)
+            REQUEST_DB_SECONDS.labels(method, route_path).observe(stats.seconds)
+            if stats.sql is not None and route is not None:
+                try:
+                    check_query_budget(route, stats.sql, stats.batches)
+                except QueryBudgetExceeded as e:
+                    logger.warning('%s', e)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Метрики в текстовом формате Prometheus, суммированные по воркерам"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
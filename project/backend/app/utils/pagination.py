@@ -0,0 +1,28 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values) -> str:
+    """Упаковка ключа последней строки страницы, например (created_at, id), в непрозрачный курсор"""
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Распаковка курсора в значения заданных типов. ValueError, если курсор повреждён"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, values)
+        )
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError('Некорректный курсор') from e
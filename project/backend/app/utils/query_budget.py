@@ -0,0 +1,100 @@
+from typing import Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import event
+from starlette.routing import Match
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Маршрут выполнил больше SQL-запросов, чем объявлено в query_budget"""
+
+    def __init__(self, route: str, budget: int, statements: list[str]):
+        self.route = route
+        self.budget = budget
+        self.statements = statements
+        listing = '\n'.join(f'  {i}. {sql}' for i, sql in enumerate(statements, 1))
+        super().__init__(
+            f'{route}: {len(statements)} SQL-запросов при бюджете {budget}\n{listing}'
+        )
+
+
+def query_budget(statements: int, per_batch: int = 0):
+    """Объявить максимальное число SQL-запросов на один вызов маршрута.
+
+    Ставится под декоратором роутера:
+
+        @router.get('/')
+        @query_budget(3)
+        async def get_items(...): ...
+
+    statements - бюджет с одной пачкой; per_batch - сколько добавляет каждая
+    следующая пачка у маршрутов, обрабатывающих данные пачками (импорт).
+    """
+    def decorator(endpoint):
+        endpoint.__query_budget__ = (statements, per_batch)
+        return endpoint
+    return decorator
+
+
+def get_query_budget(route, batches: int = 1) -> Optional[int]:
+    budget = getattr(getattr(route, 'endpoint', None), '__query_budget__', None)
+    if budget is None:
+        return None
+    statements, per_batch = budget
+    return statements + per_batch * max(batches - 1, 0)
+
+
+def check_query_budget(route, statements: list[str], batches: int = 1) -> None:
+    """QueryBudgetExceeded, если маршрут вышел за свой бюджет"""
+    budget = get_query_budget(route, batches)
+    if budget is not None and len(statements) > budget:
+        raise QueryBudgetExceeded(f'{",".join(sorted(route.methods))} {route.path}', budget, statements)
+
+
+class QueryRecorder:
+    """Запись всех SQL-запросов движков внутри блока with (для тестов)"""
+
+    def __init__(self, *engines):
+        self.engines = [getattr(engine, 'sync_engine', engine) for engine in engines if engine is not None]
+        self.statements: list[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> 'QueryRecorder':
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._record)
+
+
+def find_route(app, method: str, url: str):
+    path = urlsplit(url).path
+    scope = {'type': 'http', 'method': method.upper(), 'path': path}
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+def assert_query_budget(client, method: str, url: str, engines=None, batches: int = 1, **kwargs):
+    """Выполнить запрос через TestClient и проверить бюджет SQL-запросов маршрута.
+
+    По умолчанию считаются запросы к основной БД и к реплике, batches - число
+    пачек в запросе к маршруту с бюджетом на пачку. Возвращает
+    ответ; при превышении бросает QueryBudgetExceeded со списком SQL.
+    """
+    if engines is None:
+        from database import engine, replica_engine
+        engines = (engine, replica_engine)
+
+    route = find_route(client.app, method, url)
+    with QueryRecorder(*engines) as recorder:
+        response = client.request(method, url, **kwargs)
+    if route is not None:
+        check_query_budget(route, recorder.statements, batches)
+    return response
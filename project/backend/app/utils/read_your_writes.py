@@ -0,0 +1,29 @@
+from config import settings
+from database import READ_METHODS, READ_PRIMARY_COOKIE
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware: после успешного изменения клиент REPLICA_STICKY_SECONDS читает с основной БД.
+
+    Метка - короткоживущая cookie, поэтому работает между воркерами и не
+    требует общего состояния. Её проверяет get_read_db.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.cookie = (
+            f'{READ_PRIMARY_COOKIE}=1; Max-Age={settings.REPLICA_STICKY_SECONDS}; '
+            f'Path=/; HttpOnly; SameSite=Lax'
+        ).encode('latin-1')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] in READ_METHODS + ('OPTIONS',):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start' and message['status'] < 400:
+                message['headers'] = [*message.get('headers', []), (b'set-cookie', self.cookie)]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
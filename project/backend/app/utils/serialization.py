@@ -0,0 +1,29 @@
+from functools import lru_cache
+from typing import Iterable, List
+
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # без orjson сериализуем через pydantic
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter для списка моделей, строится один раз на модель"""
+    return TypeAdapter(List[model])
+
+
+def dump_rows(rows: Iterable, model: type[BaseModel]) -> bytes:
+    """JSON-массив из строк БД, выбранных ровно по полям model.
+
+    Строки уже имеют нужные типы, поэтому с orjson они кодируются напрямую.
+    Без orjson - TypeAdapter списка: validate_python и dump_json в pydantic-core
+    быстрее, чем model_construct по одной модели.
+    """
+    items = [row._asdict() for row in rows]
+    if orjson is not None:
+        return orjson.dumps(items)
+    adapter = list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(items))
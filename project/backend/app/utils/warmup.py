@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from config import settings
+from database import async_session_maker, replica_session_maker
+from dtos.client import ClientResponse
+from dtos.deal import DealResponse
+from services.auth_service import AuthService
+from services.client_service import ClientService
+from services.deal_service import DealService
+from utils.serialization import dump_rows, list_adapter
+
+logger = logging.getLogger(__name__)
+
+
+async def _warm_connection(session_maker, with_stats: bool = False) -> None:
+    """Горячие запросы на одном соединении пула.
+
+    Первое выполнение кладёт скомпилированный SQL в кэш движка, а asyncpg
+    готовит запросы на этом соединении, поэтому первые запросы после старта
+    не платят ни за подключение, ни за компиляцию. Запросы дешёвые (limit=1,
+    по ключу); статистика может быть агрегатом по всем сделкам, поэтому
+    она выполняется только при with_stats - один раз на воркер.
+    """
+    async with session_maker() as session:
+        deals = DealService(session)
+        await deals.get_version()
+        rows, _, _ = await deals.get_all(limit=1, as_rows=True)
+        dump_rows(rows, DealResponse)
+        if with_stats:
+            await deals.get_stats()
+        clients, _ = await ClientService(session).get_all(limit=1, as_rows=True)
+        dump_rows(clients, ClientResponse)
+        await AuthService(session).get_by_username('')
+
+
+class Warmup:
+    """Прогрев воркера после старта; до его окончания /health/ready отвечает 503.
+
+    Соединения открываются одновременно, чтобы пул получил WARMUP_CONNECTIONS
+    разных соединений. Если БД ещё недоступна, прогрев повторяется.
+    """
+
+    def __init__(self, connections: int, retry_seconds: float):
+        self.connections = connections
+        self.retry_seconds = retry_seconds
+        self.ready = False
+        self.attempts = 0
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run_once(self) -> None:
+        # Валидаторы для списков строятся один раз на модель
+        list_adapter(DealResponse)
+        list_adapter(ClientResponse)
+
+        makers = [async_session_maker]
+        if replica_session_maker is not None:
+            makers.append(replica_session_maker)
+        # Статистику маршрут читает с реплики, если она есть
+        await asyncio.gather(*(
+            _warm_connection(maker, with_stats=maker is makers[-1] and i == 0)
+            for maker in makers for i in range(self.connections)
+        ))
+
+    async def run(self) -> None:
+        started = time.perf_counter()
+        while not self.ready:
+            self.attempts += 1
+            try:
+                await self._run_once()
+            except Exception as e:
+                self.error = repr(e)
+                logger.warning('Прогрев не удался (попытка %s): %r', self.attempts, e)
+                await asyncio.sleep(self.retry_seconds)
+            else:
+                self.ready = True
+                self.error = None
+                self.seconds = time.perf_counter() - started
+                logger.info('Воркер прогрет за %.2f с, соединений: %s', self.seconds, self.connections)
+
+    def start(self) -> None:
+        if self.connections <= 0:
+            self.ready = True
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name='warmup')
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            'ready': self.ready,
+            'attempts': self.attempts,
+            'seconds': self.seconds,
+            'error': self.error,
+        }
+
+
+warmup = Warmup(
+    # Сверх pool_size соединения закрываются при возврате, прогревать их незачем
+    connections=min(settings.WARMUP_CONNECTIONS, settings.DB_POOL_SIZE),
+    retry_seconds=settings.WARMUP_RETRY_SECONDS,
+)
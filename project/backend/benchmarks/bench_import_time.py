@@ -0,0 +1,117 @@
+"""Время холодного старта по `python -X importtime`: import main и create_app().
+
+main импортирует роутеры, сервисы и БД только в create_app(), поэтому
+отдельно меряются import main (то, что платят скрипты и alembic) и все
+импорты старта воркера - import main вместе с create_app(). Каждый прогон -
+отдельный процесс. Печатает медианы и пакеты, которые больше всего
+добавляют к старту.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --runs 5 --save benchmarks/import_baseline.json
+
+По умолчанию результат сравнивается с benchmarks/import_baseline.json:
+код возврата 1, если импорт при старте вырос больше, чем на
+--max-regression, или import main перестал быть лёгким (--max-main-ms).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+APP_DIR = os.path.join(os.path.dirname(__file__), '..', 'app')
+BASELINE = os.path.join(os.path.dirname(__file__), 'import_baseline.json')
+
+
+def parse_importtime(stderr: str) -> tuple[dict, int, int]:
+    """Собственное время (µs) по корневым пакетам, время import main и всех импортов"""
+    by_package = defaultdict(int)
+    main_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        module = name.strip()
+        by_package[module.split('.')[0]] += int(self_us)
+        if module == 'main':
+            main_us = int(cumulative_us)
+    return by_package, main_us, sum(by_package.values())
+
+
+def run_once() -> tuple[dict, int, int]:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main; main.create_app()'],
+        cwd=APP_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'create_app() завершился с ошибкой:\n{result.stderr[-2000:]}')
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--save', help='Сохранить результаты в JSON')
+    parser.add_argument('--compare', default=BASELINE, help='Сравнить с сохранённой базовой линией')
+    parser.add_argument('--no-compare', action='store_true', help='Только измерить')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    parser.add_argument('--max-main-ms', type=float, default=100,
+                        help='Предел import main без create_app()')
+    args = parser.parse_args()
+
+    mains, totals, packages = [], [], defaultdict(list)
+    for _ in range(args.runs):
+        by_package, main_us, total_us = run_once()
+        mains.append(main_us)
+        totals.append(total_us)
+        for package, self_us in by_package.items():
+            packages[package].append(self_us)
+
+    main_ms = statistics.median(mains) / 1000
+    startup_ms = statistics.median(totals) / 1000
+    top = sorted(
+        ((package, statistics.median(values) / 1000) for package, values in packages.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:args.top]
+
+    print(f'import main:            {main_ms:8.1f} ms (медиана из {args.runs})')
+    print(f'импорты со create_app(): {startup_ms:8.1f} ms '
+          f'(разброс {min(totals) / 1000:.1f}-{max(totals) / 1000:.1f} ms)')
+    print('\nПакеты по собственному времени импорта:')
+    for package, ms in top:
+        print(f'  {package:<24} {ms:8.1f} ms')
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'runs': args.runs,
+        'main_ms': main_ms,
+        'startup_ms': startup_ms,
+        'packages_ms': dict(top),
+    }
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    failed = False
+    if main_ms > args.max_main_ms:
+        print(f'\nimport main дольше {args.max_main_ms:.0f} ms: тяжёлые импорты попали на уровень модуля')
+        failed = True
+    if args.compare and not args.no_compare and not args.save:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        change = startup_ms / baseline['startup_ms'] - 1 if baseline['startup_ms'] else 0.0
+        regressed = change > args.max_regression
+        print(f"\nСравнение с базовой линией ({baseline['created_at'][:10]}): "
+              f"импорты при старте {change:+.1%}{'  РЕГРЕССИЯ' if regressed else ''}")
+        failed = failed or regressed
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Накладные расходы логирования на запрос в event loop.
+
+«Запрос» - корутина, которая, как обработчики в routes/deals.py, пишет две
+INFO-строки. Сравниваются: логирование выключено (f-строка и ленивый %s),
+синхронная запись в файл и очередь QueueHandler/QueueListener из
+utils/logging_config (форматирование и запись в файл в отдельном потоке).
+
+Запись строки в файл на локальном диске почти бесплатна, а stdout в
+контейнере идёт в pipe к сборщику логов и занимает десятки микросекунд;
+по умолчанию запись строки задерживается на --sink-delay-us=20.
+
+    python benchmarks/bench_logging.py --requests 50000
+    python benchmarks/bench_logging.py --requests 5000 --sink-delay-us 200
+
+Код возврата 1, если запись через очередь в event loop не быстрее синхронной.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from utils.logging_config import (  # noqa: E402
+    DroppingQueueHandler, RequestContextFilter, get_logging_stats, request_id_var
+)
+from logging.handlers import QueueListener  # noqa: E402
+import queue  # noqa: E402
+
+logger = logging.getLogger('routes.deals')
+FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+
+
+async def handler_fstring(deal_id: int, user_id: int):
+    logger.info(f'Обновление сделки {deal_id} пользователем {user_id}')
+    logger.info(f'Сделка {deal_id} обновлена')
+
+
+async def handler_lazy(deal_id: int, user_id: int):
+    logger.info('Обновление сделки %s пользователем %s', deal_id, user_id)
+    logger.info('Сделка %s обновлена', deal_id)
+
+
+async def run(handler, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        request_id_var.set(f'req-{i}')
+        await handler(i, 1)
+    return (time.perf_counter() - started) / requests
+
+
+class SlowFileHandler(logging.FileHandler):
+    """Файл, запись в который иногда блокируется (как stdout в занятый сборщик логов)"""
+
+    delay_seconds = 0.0
+
+    def emit(self, record):
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        super().emit(record)
+
+
+def configure(mode: str, path: str):
+    root = logging.getLogger()
+    root.handlers = []
+    listener = None
+    if mode == 'off':
+        root.setLevel(logging.WARNING)
+        return None
+    root.setLevel(logging.INFO)
+    output = SlowFileHandler(path, encoding='utf-8')
+    output.setFormatter(logging.Formatter(FORMAT))
+    if mode == 'sync':
+        output.addFilter(RequestContextFilter())
+        root.addHandler(output)
+    else:
+        handler = DroppingQueueHandler(queue.Queue(maxsize=100_000))
+        handler.addFilter(RequestContextFilter())
+        root.addHandler(handler)
+        listener = QueueListener(handler.queue, output)
+        listener.start()
+    return listener
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=50_000)
+    parser.add_argument('--sink-delay-us', type=float, default=20, help='Задержка записи одной строки')
+    args = parser.parse_args()
+    SlowFileHandler.delay_seconds = args.sink_delay_us / 1e6
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ('выключено, f-строка', 'off', handler_fstring),
+            ('выключено, ленивый %s', 'off', handler_lazy),
+            ('INFO, синхронно в файл', 'sync', handler_lazy),
+            ('INFO, через очередь', 'queue', handler_lazy),
+        ]
+        results = {}
+        for title, mode, handler in cases:
+            listener = configure(mode, os.path.join(tmp, f'{mode}.log'))
+            per_request = asyncio.run(run(handler, args.requests))
+            if listener is not None:
+                listener.stop()
+            results[mode] = per_request
+            print(f'{title:<26} {per_request * 1e6:7.2f} µs/запрос в event loop')
+    print('logging stats:', get_logging_stats())
+    if results['queue'] >= results['sync']:
+        print('Очередь не быстрее синхронной записи')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Влияние bcrypt на задержку соседних запросов в том же event loop.
+
+Запускает пачку одновременных логинов (verify_password) и параллельно
+«пробу» — короткий запрос, который каждые 5 мс просыпается и меряет,
+насколько позже положенного он получил управление. Сравниваются
+синхронная проверка пароля и проверка через пул потоков.
+
+    python benchmarks/bench_password_hashing.py --logins 40
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from utils.auth import (  # noqa: E402
+    get_password_hasher_stats,
+    hash_password,
+    verify_password,
+    verify_password_async,
+)
+
+PROBE_INTERVAL = 0.005
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(stop: asyncio.Event, delays: list):
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        delays.append(max(0.0, time.perf_counter() - expected))
+
+
+async def login_sync(hashed: str):
+    return verify_password('secret', hashed)
+
+
+async def login_async(hashed: str):
+    return await verify_password_async('secret', hashed)
+
+
+async def run(mode: str, logins: int, hashed: str) -> dict:
+    login = login_sync if mode == 'sync' else login_async
+    stop = asyncio.Event()
+    delays = []
+    probe_task = asyncio.create_task(probe(stop, delays))
+    await asyncio.sleep(PROBE_INTERVAL * 4)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login(hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    return {
+        'mode': mode,
+        'logins_per_s': logins / elapsed,
+        'probe_p50_ms': statistics.median(delays) * 1000,
+        'probe_p99_ms': percentile(delays, 99) * 1000,
+        'probe_max_ms': max(delays) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=40)
+    args = parser.parse_args()
+
+    hashed = hash_password('secret')
+    for mode in ('sync', 'executor'):
+        result = asyncio.run(run(mode, args.logins, hashed))
+        print(
+            f"{result['mode']:>8}: {result['logins_per_s']:7.1f} logins/s, "
+            f"probe p50={result['probe_p50_ms']:.1f}ms "
+            f"p99={result['probe_p99_ms']:.1f}ms max={result['probe_max_ms']:.1f}ms"
+        )
+    print('hasher stats:', get_password_hasher_stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Скорость сериализации списков сделок и клиентов (строк в секунду).
+
+Сравнивает прежний путь FastAPI (валидация ORM-объектов через response_model
+и кодирование стандартным json), TypeAdapter для всего списка, доверенное
+построение model_construct и прямое кодирование строк БД через orjson.
+
+    python benchmarks/bench_serialization.py --rows 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from dtos.client import ClientResponse  # noqa: E402
+from dtos.deal import DealResponse  # noqa: E402
+from dtos.enums import DealStatus  # noqa: E402
+from utils.serialization import dump_rows, list_adapter, orjson  # noqa: E402
+
+DealRow = namedtuple('DealRow', list(DealResponse.model_fields))
+ClientRow = namedtuple('ClientRow', list(ClientResponse.model_fields))
+
+
+def make_deals(count: int) -> list:
+    now = datetime.now()
+    statuses = list(DealStatus)
+    return [
+        DealRow(
+            id=i, title=f'Сделка {i}', created_by=1 + i % 20, amount=float(i * 100),
+            status=statuses[i % 4], assigned_to=None if i % 10 == 0 else 1 + i % 30,
+            created_at=now - timedelta(seconds=i), updated_at=now,
+            closed_at=now if statuses[i % 4] in (DealStatus.WON, DealStatus.LOST) else None,
+        )
+        for i in range(count)
+    ]
+
+
+def make_clients(count: int) -> list:
+    return [ClientRow(id=i, name=f'Клиент {i}') for i in range(count)]
+
+
+def fastapi_default(rows, model):
+    # Так раньше работал response_model: валидация ORM-объектов и json.dumps
+    objects = [SimpleNamespace(**row._asdict()) for row in rows]
+    validated = list_adapter(model).validate_python(objects, from_attributes=True)
+    return json.dumps([item.model_dump(mode='json') for item in validated]).encode('utf-8')
+
+
+def type_adapter(rows, model):
+    adapter = list_adapter(model)
+    return adapter.dump_json(adapter.validate_python([row._asdict() for row in rows]))
+
+
+def trusted_construct(rows, model):
+    return list_adapter(model).dump_json([model.model_construct(**row._asdict()) for row in rows])
+
+
+def fast_path(rows, model):
+    return dump_rows(rows, model)
+
+
+def measure(func, rows, model, seconds: float) -> float:
+    func(rows, model)
+    done = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        func(rows, model)
+        done += len(rows)
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    candidates = [
+        ('fastapi response_model', fastapi_default),
+        ('TypeAdapter validate+dump', type_adapter),
+        ('model_construct+dump', trusted_construct),
+        ('dump_rows (orjson)' if orjson else 'dump_rows (без orjson)', fast_path),
+    ]
+    for title, rows, model in (
+        ('deals', make_deals(args.rows), DealResponse),
+        ('clients', make_clients(args.rows), ClientResponse),
+    ):
+        print(f'{title}, {args.rows} строк на страницу:')
+        baseline = None
+        for name, func in candidates:
+            rate = measure(func, rows, model, args.seconds)
+            baseline = baseline or rate
+            print(f'  {name:<28} {rate:>12,.0f} rows/s  x{rate / baseline:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Стоимость проверки JWT на запрос: jose.jwt.decode против кэша проверенных токенов.
+
+Имитирует поток запросов от --sessions браузерных сессий: каждая сессия
+повторно присылает один и тот же токен.
+
+    python benchmarks/bench_token_decode.py --sessions 200 --requests 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from config import settings  # noqa: E402
+from jose import jwt  # noqa: E402
+from utils.auth import create_access_token, decode_token, get_token_cache_stats, token_cache  # noqa: E402
+
+
+def decode_uncached(token: str) -> dict:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def run(decode, stream: list) -> float:
+    started = time.perf_counter()
+    for token in stream:
+        decode(token)
+    return (time.perf_counter() - started) / len(stream)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=100_000)
+    args = parser.parse_args()
+
+    tokens = [
+        create_access_token(
+            {'sub': f'user{i}', 'uid': i, 'role': 'manager', 'tv': 0},
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        )
+        for i in range(args.sessions)
+    ]
+    rng = random.Random(0)
+    stream = [rng.choice(tokens) for _ in range(args.requests)]
+
+    token_cache.clear()
+    uncached = run(decode_uncached, stream)
+    cached = run(decode_token, stream)
+    print(f'jose.jwt.decode: {uncached * 1e6:7.2f} µs/запрос')
+    print(f'кэш токенов:     {cached * 1e6:7.2f} µs/запрос ({uncached / cached:.1f}x)')
+    print('token cache stats:', get_token_cache_stats())
+
+
+if __name__ == '__main__':
+    main()
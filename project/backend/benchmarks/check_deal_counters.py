@@ -0,0 +1,149 @@
+"""Проверка счётчиков deal_status_stats и свёртки deal_daily_stats после изменений сделок.
+
+Заполняет БД (loadtest/seed.py), пересчитывает свёртку, затем через API
+создаёт, меняет (PUT и массово по id и по фильтру) и удаляет сделки. После
+каждого шага счётчики и свёртка сравниваются с агрегатом по deals, а ответ
+массового изменения - с прежними статусами сделок. По умолчанию работает
+на временном SQLite-файле, DATABASE_URL можно задать:
+
+    python benchmarks/check_deal_counters.py
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/check_deal_counters.py
+
+Код возврата 1 при любом расхождении.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from collections import Counter
+from decimal import Decimal
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix='deal_counters_'), 'crm.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite+aiosqlite:///{DB_FILE}')
+os.environ['DEAL_STATS_STORE'] = 'true'
+os.environ['DEAL_DAILY_STATS_STORE'] = 'true'
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'loadtest'))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from common import LOADTEST_PASSWORD, LOADTEST_USER  # noqa: E402
+from config import settings  # noqa: E402
+from database import async_session_maker, engine  # noqa: E402
+from dtos.enums import DealStatus  # noqa: E402
+from main import create_app  # noqa: E402
+from models import Deal, DealDailyStats, DealStatusStats  # noqa: E402
+from seed import seed  # noqa: E402
+from services.deal_analytics_service import DAY, MANAGER, DealAnalyticsService  # noqa: E402
+
+
+async def prepare() -> None:
+    await seed(users=5, clients=20, deals=300, seed_value=7)
+    async with async_session_maker() as db:
+        await DealAnalyticsService(db).reconcile()
+    await engine.dispose()
+
+
+async def mismatches() -> list[str]:
+    """Расхождения счётчиков и свёртки с агрегатом по deals"""
+    def nonzero(rows) -> dict:
+        return {
+            (DealStatus(key[0]), *key[1:]): (int(count), Decimal(amount or 0))
+            for *key, count, amount in rows if count or amount
+        }
+
+    # Отдельный движок: пул приложения привязан к event loop TestClient
+    check_engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    async with check_engine.connect() as db:
+        by_status = nonzero(await db.execute(
+            select(Deal.status, func.count(Deal.id), func.sum(Deal.amount)).group_by(Deal.status)
+        ))
+        stats = nonzero(await db.execute(
+            select(DealStatusStats.status, DealStatusStats.deals_count, DealStatusStats.amount_sum)
+        ))
+        by_day = nonzero(await db.execute(
+            select(Deal.status, DAY, MANAGER, func.count(Deal.id), func.sum(Deal.amount))
+            .group_by(Deal.status, DAY, MANAGER)
+        ))
+        daily = nonzero(await db.execute(
+            select(
+                DealDailyStats.status, DealDailyStats.day, DealDailyStats.assigned_to,
+                DealDailyStats.deals_count, DealDailyStats.amount_sum
+            )
+        ))
+    await check_engine.dispose()
+
+    problems = []
+    if stats != by_status:
+        problems.append(f'deal_status_stats {stats} != deals {by_status}')
+    if daily != by_day:
+        diff = {key: (daily.get(key), by_day.get(key)) for key in daily.keys() | by_day.keys()
+                if daily.get(key) != by_day.get(key)}
+        problems.append(f'deal_daily_stats расходится с deals: {diff}')
+    return problems
+
+
+def main() -> int:
+    asyncio.run(prepare())
+
+    failed = 0
+
+    def check(step: str, response, expected_status: int) -> None:
+        nonlocal failed
+        problems = []
+        if response.status_code != expected_status:
+            problems.append(f'ответ {response.status_code} {response.text[:200]}')
+        problems += asyncio.run(mismatches())
+        failed += bool(problems)
+        print(f"{'FAIL' if problems else 'ok':>4}  {step} {'; '.join(problems)}")
+
+    with TestClient(create_app()) as client:
+        response = client.post('/api/auth/login', data={'username': LOADTEST_USER, 'password': LOADTEST_PASSWORD})
+        response.raise_for_status()
+        client.headers['Authorization'] = f"Bearer {response.json()['access_token']}"
+
+        deals = client.get('/api/deals/?limit=40').json()
+        client_id = client.get('/api/clients/?limit=1').json()[0]['id']
+        first = deals[0]
+        other_status = 'won' if first['status'] != 'won' else 'lost'
+
+        check('PUT статус и сумма', client.put(
+            f"/api/deals/{first['id']}", json={'status': other_status, 'amount': 123456}
+        ), 200)
+        check('PUT ответственный', client.put(
+            f"/api/deals/{first['id']}", json={'assigned_to': deals[1]['created_by']}
+        ), 200)
+
+        batch = deals[2:12]
+        response = client.post('/api/deals/bulk', json={
+            'ids': [deal['id'] for deal in batch], 'patch': {'status': 'negotiation'},
+        })
+        check('bulk по id', response, 200)
+        expected = dict(Counter(deal['status'] for deal in batch))
+        if response.status_code == 200 and response.json()['by_status'] != expected:
+            failed += 1
+            print(f"FAIL  bulk по id: by_status {response.json()['by_status']} != прежние статусы {expected}")
+
+        response = client.post('/api/deals/bulk', json={
+            'filter': {'status': 'new'}, 'patch': {'status': 'lost', 'assigned_to': deals[2]['created_by']},
+        })
+        check('bulk по фильтру', response, 200)
+        if response.status_code == 200 and set(response.json()['by_status']) - {'new'}:
+            failed += 1
+            print(f"FAIL  bulk по фильтру: by_status {response.json()['by_status']} вместо new")
+
+        check('POST', client.post('/api/deals/', json={
+            'title': 'Проверка счётчиков', 'client_id': client_id, 'amount': 500, 'status': 'won',
+        }), 201)
+        check('DELETE', client.delete(f"/api/deals/{deals[20]['id']}"), 204)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Проверка бюджетов SQL-запросов маршрутов (@query_budget).
+
+Заполняет БД небольшим набором данных (loadtest/seed.py), вызывает каждый
+маршрут с объявленным бюджетом через TestClient внутри assert_query_budget
+и печатает SQL тех, кто вышел за бюджет. Кэши пользователей и ответов
+выключены, счётчики и свёртка включены - проверяется самый дорогой путь.
+По умолчанию работает на временном SQLite-файле, DATABASE_URL можно задать:
+
+    python benchmarks/check_query_budgets.py
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/check_query_budgets.py
+
+Код возврата 1, если маршрут превысил бюджет, ответил ошибкой или не проверен.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix='query_budget_'), 'crm.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite+aiosqlite:///{DB_FILE}')
+os.environ.setdefault('PRINCIPAL_CACHE_TTL_SECONDS', '0')
+os.environ.setdefault('CACHE_BACKEND', 'none')
+os.environ.setdefault('DEAL_STATS_STORE', 'true')
+os.environ.setdefault('DEAL_DAILY_STATS_STORE', 'true')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+# Импорт в проверке - две пачки, чтобы проверить и бюджет на пачку
+os.environ.setdefault('DEAL_IMPORT_BATCH_SIZE', '10')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'loadtest'))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from common import LOADTEST_PASSWORD, LOADTEST_USER  # noqa: E402
+from main import create_app  # noqa: E402
+from seed import seed  # noqa: E402
+from utils.query_budget import QueryBudgetExceeded, assert_query_budget, find_route, get_query_budget  # noqa: E402
+
+# Маршруты, которые TestClient вызвать не может
+SKIPPED = {
+    ('GET', '/api/deals/events'): 'бесконечный поток SSE, TestClient читает ответ целиком',
+}
+
+
+def import_file(client_id: int, assigned_to: int, rows: int) -> bytes:
+    lines = ['title,client_id,amount,assigned_to']
+    lines += [f'"Импорт {i}, проверка бюджета",{client_id},{100 + i},{assigned_to}' for i in range(rows)]
+    return '\n'.join(lines).encode()
+
+
+def calls(client: TestClient, headers: dict) -> list[tuple[str, str, dict]]:
+    """(метод, url, параметры запроса) для каждого маршрута с бюджетом"""
+    deals = client.get('/api/deals/?limit=10', headers=headers).json()
+    clients = client.get('/api/clients/?limit=10', headers=headers).json()
+    deal_id, other_id, bulk_id = deals[0]['id'], deals[1]['id'], deals[2]['id']
+    today = date.today().isoformat()
+    return [
+        ('POST', '/api/auth/register', {'json': {
+            'username': 'budget_check', 'email': 'budget_check@example.com', 'password': 'secret',
+        }}),
+        ('POST', '/api/auth/login', {'data': {'username': LOADTEST_USER, 'password': LOADTEST_PASSWORD}}),
+        ('GET', '/api/auth/me', {}),
+        ('GET', '/api/clients/?limit=100&search=1', {}),
+        ('GET', '/api/deals/?limit=100&status=new&with_total=true', {}),
+        ('POST', '/api/deals/', {'json': {
+            'title': 'Проверка бюджета', 'client_id': clients[0]['id'], 'amount': 1000,
+            'assigned_to': deals[0]['created_by'],
+        }}),
+        ('POST', '/api/deals/import?format=csv', {'batches': 2, 'files': {
+            'file': ('deals.csv', import_file(clients[0]['id'], deals[0]['created_by'], 15), 'text/csv'),
+        }}),
+        ('POST', '/api/deals/bulk', {'json': {
+            'ids': [bulk_id], 'patch': {'status': 'won', 'assigned_to': deals[0]['created_by']},
+        }}),
+        ('POST', '/api/deals/events/ticket', {}),
+        ('GET', '/api/deals/export?format=csv&status=won', {}),
+        ('GET', '/api/deals/stats', {}),
+        ('GET', f'/api/deals/cohort-funnel?date_from=2000-01-01&date_to={today}&by_manager=true', {}),
+        ('GET', f'/api/deals/{deal_id}', {}),
+        ('PUT', f'/api/deals/{deal_id}', {'json': {'status': 'lost', 'amount': 2000}}),
+        ('DELETE', f'/api/deals/{other_id}', {}),
+    ]
+
+
+def main() -> int:
+    asyncio.run(seed(users=5, clients=20, deals=200, seed_value=1))
+
+    app = create_app()
+    failed = 0
+    checked = set()
+    with TestClient(app) as client:
+        # Прогрев выполняет свои запросы, они не должны попасть в подсчёт
+        deadline = time.monotonic() + 30
+        while client.get('/health/ready').status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+        response = client.post('/api/auth/login', data={'username': LOADTEST_USER, 'password': LOADTEST_PASSWORD})
+        response.raise_for_status()
+        headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+        for method, url, kwargs in calls(client, headers):
+            route = find_route(app, method, url)
+            checked.add((method, route.path))
+            try:
+                response = assert_query_budget(client, method, url, headers=headers, **kwargs)
+            except QueryBudgetExceeded as e:
+                failed += 1
+                print(f'FAIL  {e}')
+                continue
+            if response.status_code >= 400:
+                failed += 1
+                print(f'FAIL  {method} {url}: ответ {response.status_code} {response.text[:200]}')
+                continue
+            print(f"  ok  {method} {url} (бюджет {get_query_budget(route, kwargs.get('batches', 1))})")
+
+    for route in app.routes:
+        if get_query_budget(route) is None:
+            continue
+        for method in sorted(route.methods):
+            if (method, route.path) in checked:
+                continue
+            reason = SKIPPED.get((method, route.path))
+            if reason:
+                print(f'skip  {method} {route.path}: {reason}')
+            else:
+                failed += 1
+                print(f'FAIL  {method} {route.path}: бюджет объявлен, но маршрут не проверен')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
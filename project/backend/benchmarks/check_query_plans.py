@@ -0,0 +1,171 @@
+"""Регрессионная проверка планов запросов списка сделок и поиска клиентов.
+
+В отдельной схеме (внутри транзакции, которая в конце откатывается)
+создаёт таблицы по моделям, заполняет их реалистичным объёмом данных
+и через EXPLAIN проверяет, что каждое сочетание фильтров DealService.get_all
+идёт по индексу без Seq Scan по deals и без сортировки, а поиск клиентов
+использует триграммный индекс.
+
+Исключение - фильтры с client_id. ix_deals_client_id_created_at_id может
+отдать сделки клиента сразу в порядке created_at DESC, id DESC, но у клиента
+их единицы, и планировщик обоснованно выбирает bitmap-чтение по тому же
+индексу и top-N сортировку в памяти: это дешевле обхода индекса по одной
+строке. Поэтому для них проверяется, что используется именно этот индекс,
+а Sort допускается только над небольшим числом строк (SORT_ROWS). Если
+сделок у клиента станет много, сортировка вырастет, и проверка упадёт.
+Нужен PostgreSQL:
+
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/check_query_plans.py --deals 200000
+
+Код возврата 1, если хотя бы один план не прошёл проверку.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from sqlalchemy import select, text, tuple_  # noqa: E402
+
+from database import Base, engine  # noqa: E402
+from dtos.enums import DealStatus  # noqa: E402
+from models.client import Client  # noqa: E402
+from models.deal import Deal  # noqa: E402
+from services.client_service import ClientService  # noqa: E402
+from services.deal_service import DealService  # noqa: E402
+
+SCHEMA = 'plan_check'
+USERS = 50
+CLIENTS = 20000
+PAGE = 100
+CLIENT_INDEX = 'ix_deals_client_id_created_at_id'
+# Сколько строк по оценке планировщика допустимо сортировать в запросах с client_id
+SORT_ROWS = 10 * PAGE
+TRGM_INDEX = 'ix_clients_name_trgm'
+
+SEED = [
+    f"""INSERT INTO users (username, email, hashed_password, role, is_active, created_at, updated_at)
+        SELECT 'user' || g, 'user' || g || '@example.com', 'x', 'manager', true, now(), now()
+        FROM generate_series(1, {USERS}) g""",
+    f"""INSERT INTO clients (name, created_by, created_at, updated_at)
+        SELECT 'Клиент ' || md5(g::text), 1 + g % {USERS}, now(), now()
+        FROM generate_series(1, {CLIENTS}) g""",
+    f"""INSERT INTO deals (title, client_id, amount, status, created_by, assigned_to, created_at, updated_at)
+        SELECT 'Сделка ' || g, 1 + (g * 7919) % {CLIENTS}, (g % 1000) * 100,
+               (enum_range(NULL::dealstatus))[1 + g % 4], 1 + g % {USERS},
+               CASE WHEN g % 10 = 0 THEN NULL ELSE 1 + (g * 31) % {USERS} END,
+               now() - make_interval(secs => g), now()
+        FROM generate_series(1, :deals) g""",
+    "ANALYZE",
+]
+
+
+def walk(node: dict):
+    yield node
+    for child in node.get('Plans', []):
+        yield from walk(child)
+
+
+def plan_problems(plan: dict, table: str, index: str | None = None, sort_rows: int = 0) -> list[str]:
+    """Нарушения в плане; sort_rows - сколько строк на входе Sort допустимо (0 - сортировка запрещена)"""
+    nodes = list(walk(plan))
+    problems = []
+    for node in nodes:
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == table:
+            problems.append(f'Seq Scan по {table}')
+        if node['Node Type'] in ('Sort', 'Incremental Sort'):
+            rows = max(child['Plan Rows'] for child in node['Plans'])
+            if rows > sort_rows:
+                problems.append(f"{node['Node Type']} {rows} строк")
+    if index and not any(node.get('Index Name') == index for node in nodes):
+        problems.append(f'не используется {index}')
+    return problems
+
+
+async def explain(conn, query) -> dict:
+    sql = str(query.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    result = await conn.execute(text(f'EXPLAIN (FORMAT JSON) {sql}'))
+    raw = result.scalar()
+    return (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+
+
+def deal_queries():
+    service = DealService(db=None)
+    filters = {
+        'status': DealStatus.NEGOTIATION,
+        'client_id': 42,
+        'assigned_to': 7,
+    }
+    for size in range(len(filters) + 1):
+        for names in itertools.combinations(filters, size):
+            kwargs = {name: filters[name] for name in names}
+            query = service._apply_filters(select(Deal), **kwargs)
+            query = query.order_by(Deal.created_at.desc(), Deal.id.desc())
+            label = '+'.join(names) or 'без фильтров'
+            checks = {'index': CLIENT_INDEX, 'sort_rows': SORT_ROWS} if 'client_id' in names else {}
+            yield label, query.limit(PAGE + 1), checks
+            yield f'{label}, курсор', query.where(
+                tuple_(Deal.created_at, Deal.id) < tuple_(datetime.now(), 10 ** 9)
+            ).limit(PAGE + 1), checks
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--deals', type=int, default=200000)
+    args = parser.parse_args()
+
+    failed = 0
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            trgm = await conn.scalar(text(
+                "SELECT true FROM pg_available_extensions WHERE name = 'pg_trgm'"
+            ))
+            search_path = SCHEMA
+            if trgm:
+                await conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+                # Схема расширения нужна только ради gin_trgm_ops. Все таблицы и типы создаются
+                # в SCHEMA без проверки существования, поэтому рабочие таблицы из public
+                # (если pg_trgm установлен туда) перекрыты и не затрагиваются
+                trgm_schema = await conn.scalar(text(
+                    "SELECT extnamespace::regnamespace::text FROM pg_extension WHERE extname = 'pg_trgm'"
+                ))
+                search_path = f'{SCHEMA}, {trgm_schema}'
+            else:
+                # Сборка PostgreSQL без contrib: индекс поиска клиентов создать нельзя
+                index = next(index for index in Client.__table__.indexes if index.name == TRGM_INDEX)
+                Client.__table__.indexes.discard(index)
+            await conn.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+            await conn.execute(text(f'SET LOCAL search_path TO {search_path}'))
+            await conn.run_sync(Base.metadata.create_all, checkfirst=False)
+            for statement in SEED:
+                await conn.execute(text(statement), {'deals': args.deals})
+
+            for label, query, checks in deal_queries():
+                problems = plan_problems(await explain(conn, query), 'deals', **checks)
+                failed += bool(problems)
+                print(f"{'FAIL' if problems else 'ok':>4}  deals: {label} {'; '.join(problems)}")
+
+            if trgm:
+                client_query = ClientService(db=None)._apply_search(select(Client), 'a1b2')
+                client_query = client_query.order_by(Client.id).limit(PAGE + 1)
+                # Найденных клиентов мало, их сортировка по id допустима
+                problems = plan_problems(await explain(conn, client_query), 'clients',
+                                         index=TRGM_INDEX, sort_rows=CLIENTS)
+                failed += bool(problems)
+                print(f"{'FAIL' if problems else 'ok':>4}  clients: поиск по имени {'; '.join(problems)}")
+            else:
+                print('skip  clients: поиск по имени - расширение pg_trgm не установлено')
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
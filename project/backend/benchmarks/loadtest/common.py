@@ -0,0 +1,3 @@
+"""Общие константы генератора данных и сценариев"""
+LOADTEST_USER = 'loadtest'
+LOADTEST_PASSWORD = 'loadtest-password'
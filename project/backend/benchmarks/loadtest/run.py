@@ -0,0 +1,158 @@
+"""Нагрузочный тест CRM API: пропускная способность и p50/p95/p99 по сценариям.
+
+Приложение можно поднять заранее или передать --start-app, тогда скрипт сам
+запустит uvicorn с текущим DATABASE_URL. Данные готовит seed.py:
+
+    export DATABASE_URL=sqlite+aiosqlite:///$PWD/loadtest.db
+    python benchmarks/loadtest/seed.py --deals 50000
+    python benchmarks/loadtest/run.py --start-app --duration 10 --save baseline.json
+    python benchmarks/loadtest/run.py --start-app --duration 10 --compare baseline.json
+
+С --compare код возврата 1, если у какого-то сценария пропускная способность
+упала или p99 вырос больше, чем на --max-regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+from scenarios import SCENARIOS, prepare
+
+APP_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'app')
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_scenario(client, ctx, scenario, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> bool:
+    ok = True
+    print('\nСравнение с базовой линией:')
+    for name, current in results.items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        rps_change = current['rps'] / base['rps'] - 1 if base['rps'] else 0.0
+        p99_change = current['p99_ms'] / base['p99_ms'] - 1 if base['p99_ms'] else 0.0
+        regressed = rps_change < -max_regression or p99_change > max_regression
+        ok &= not regressed
+        print(f"  {name:<14} rps {rps_change:+7.1%}  p99 {p99_change:+7.1%}"
+              f"{'  РЕГРЕССИЯ' if regressed else ''}")
+    return ok
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get('/health/ready')).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError('Приложение не поднялось')
+            await asyncio.sleep(0.2)
+
+
+async def main_async(args) -> int:
+    app_process = None
+    if args.start_app:
+        port = args.base_url.rsplit(':', 1)[-1].strip('/')
+        app_process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--port', port, '--log-level', 'warning'],
+            cwd=APP_DIR,
+        )
+    try:
+        await wait_ready(args.base_url)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+            ctx = await prepare(client)
+            results = {}
+            for name in args.scenarios:
+                results[name] = await run_scenario(
+                    client, ctx, SCENARIOS[name], args.concurrency, args.duration
+                )
+                r = results[name]
+                print(f"{name:<14} {r['rps']:8.1f} req/s  p50={r['p50_ms']:7.1f}ms  "
+                      f"p95={r['p95_ms']:7.1f}ms  p99={r['p99_ms']:7.1f}ms  "
+                      f"ошибок {r['errors']}/{r['requests']}")
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait()
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'database': os.getenv('DATABASE_URL', '').split('@')[-1],
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'results': results,
+    }
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            if not compare(results, json.load(f), args.max_regression):
+                return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://127.0.0.1:8010')
+    parser.add_argument('--start-app', action='store_true')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--save', help='Сохранить результаты в JSON')
+    parser.add_argument('--compare', help='Сравнить с сохранённой базовой линией')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Сценарии нагрузочного теста: по одному HTTP-запросу на вызов"""
+import random
+from dataclasses import dataclass, field
+
+import httpx
+
+from common import LOADTEST_PASSWORD, LOADTEST_USER
+
+STATUSES = ['new', 'negotiation', 'won', 'lost']
+
+
+@dataclass
+class Context:
+    token: str
+    deal_ids: list[int]
+    client_ids: list[int]
+    user_ids: list[int]
+    rng: random.Random = field(default_factory=random.Random)
+
+    @property
+    def headers(self) -> dict:
+        return {'Authorization': f'Bearer {self.token}'}
+
+
+async def login_request(client: httpx.AsyncClient) -> httpx.Response:
+    return await client.post('/api/auth/login', data={
+        'username': LOADTEST_USER,
+        'password': LOADTEST_PASSWORD,
+    })
+
+
+async def prepare(client: httpx.AsyncClient) -> Context:
+    """Токен и идентификаторы существующих записей для сценариев"""
+    response = await login_request(client)
+    response.raise_for_status()
+    ctx = Context(token=response.json()['access_token'], deal_ids=[], client_ids=[], user_ids=[])
+
+    deals = (await client.get('/api/deals/?limit=500', headers=ctx.headers)).json()
+    clients = (await client.get('/api/clients/?limit=500', headers=ctx.headers)).json()
+    ctx.deal_ids = [deal['id'] for deal in deals]
+    ctx.client_ids = [item['id'] for item in clients]
+    ctx.user_ids = sorted({deal['assigned_to'] for deal in deals if deal['assigned_to']})
+    return ctx
+
+
+async def login(client, ctx):
+    return await login_request(client)
+
+
+async def me(client, ctx):
+    return await client.get('/api/auth/me', headers=ctx.headers)
+
+
+async def deals_list(client, ctx):
+    params = {'limit': 100}
+    choice = ctx.rng.random()
+    if choice < 0.3:
+        params['status'] = ctx.rng.choice(STATUSES)
+    elif choice < 0.5 and ctx.user_ids:
+        params['assigned_to'] = ctx.rng.choice(ctx.user_ids)
+    elif choice < 0.6 and ctx.client_ids:
+        params['client_id'] = ctx.rng.choice(ctx.client_ids)
+    return await client.get('/api/deals/', params=params, headers=ctx.headers)
+
+
+async def deals_create(client, ctx):
+    response = await client.post('/api/deals/', headers=ctx.headers, json={
+        'title': f'Нагрузочная сделка {ctx.rng.randrange(10 ** 9)}',
+        'client_id': ctx.rng.choice(ctx.client_ids),
+        'amount': ctx.rng.randrange(1000, 1_000_000),
+        'assigned_to': ctx.rng.choice(ctx.user_ids) if ctx.user_ids else None,
+    })
+    if response.status_code == 201:
+        ctx.deal_ids.append(response.json()['id'])
+    return response
+
+
+async def deals_update(client, ctx):
+    deal_id = ctx.rng.choice(ctx.deal_ids)
+    return await client.put(f'/api/deals/{deal_id}', headers=ctx.headers, json={
+        'status': ctx.rng.choice(STATUSES),
+    })
+
+
+async def stats(client, ctx):
+    return await client.get('/api/deals/stats', headers=ctx.headers)
+
+
+SCENARIOS = {
+    'login': login,
+    'me': me,
+    'deals_list': deals_list,
+    'deals_create': deals_create,
+    'deals_update': deals_update,
+    'stats': stats,
+}
@@ -0,0 +1,120 @@
+"""Генератор синтетических данных для нагрузочных тестов.
+
+Создаёт таблицы (init_db) и заполняет БД из DATABASE_URL пользователями,
+клиентами и сделками. Подходит и PostgreSQL, и SQLite-файл:
+
+    DATABASE_URL=sqlite+aiosqlite:///./loadtest.db python benchmarks/loadtest/seed.py --deals 50000
+
+У всех пользователей пароль совпадает с LOADTEST_PASSWORD.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app'))
+
+from sqlalchemy import func, insert, select, update  # noqa: E402
+
+from database import engine, init_db  # noqa: E402
+from dtos.enums import DealStatus  # noqa: E402
+from models import Client, Deal, DealStatusStats, User  # noqa: E402
+from utils.auth import hash_password  # noqa: E402
+
+from common import LOADTEST_PASSWORD, LOADTEST_USER  # noqa: E402
+
+CHUNK = 5000
+
+
+async def insert_chunked(conn, model, rows: list) -> None:
+    for start in range(0, len(rows), CHUNK):
+        await conn.execute(insert(model), rows[start:start + CHUNK])
+
+
+async def seed(users: int, clients: int, deals: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    await init_db()
+
+    async with engine.begin() as conn:
+        if (await conn.execute(select(func.count(User.id)))).scalar():
+            print('БД уже заполнена, пропускаю')
+            return
+
+        now = datetime.now()
+        hashed = hash_password(LOADTEST_PASSWORD)
+        await insert_chunked(conn, User, [
+            {
+                'username': LOADTEST_USER if i == 0 else f'manager{i}',
+                'email': f'user{i}@example.com',
+                'hashed_password': hashed,
+                'full_name': f'Менеджер {i}',
+                'role': 'admin' if i == 0 else 'manager',
+                'is_active': True,
+                'created_at': now,
+                'updated_at': now,
+            }
+            for i in range(users)
+        ])
+        user_ids = list((await conn.execute(select(User.id))).scalars())
+
+        await insert_chunked(conn, Client, [
+            {
+                'name': f'Клиент {i} {rng.choice(["ООО", "ИП", "АО"])}',
+                'created_by': rng.choice(user_ids),
+                'created_at': now,
+                'updated_at': now,
+            }
+            for i in range(clients)
+        ])
+        client_ids = list((await conn.execute(select(Client.id))).scalars())
+
+        statuses = list(DealStatus)
+        weights = [40, 30, 20, 10]
+        totals = {status: [0, Decimal(0)] for status in statuses}
+        rows = []
+        for i in range(deals):
+            status = rng.choices(statuses, weights)[0]
+            amount = Decimal(rng.randrange(1000, 5_000_000, 100))
+            created_at = now - timedelta(minutes=rng.randrange(0, 365 * 24 * 60))
+            closed = status in (DealStatus.WON, DealStatus.LOST)
+            rows.append({
+                'title': f'Сделка {i}',
+                'client_id': rng.choice(client_ids),
+                'amount': amount,
+                'status': status,
+                'created_by': rng.choice(user_ids),
+                'assigned_to': rng.choice(user_ids) if rng.random() < 0.9 else None,
+                'created_at': created_at,
+                'updated_at': created_at,
+                'closed_at': created_at + timedelta(days=rng.randrange(1, 60)) if closed else None,
+            })
+            totals[status][0] += 1
+            totals[status][1] += amount
+        await insert_chunked(conn, Deal, rows)
+
+        for status, (count, amount_sum) in totals.items():
+            await conn.execute(
+                update(DealStatusStats)
+                .where(DealStatusStats.status == status)
+                .values(deals_count=count, amount_sum=amount_sum)
+            )
+
+    await engine.dispose()
+    print(f'Создано: пользователей {users}, клиентов {clients}, сделок {deals}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=5000)
+    parser.add_argument('--deals', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(seed(args.users, args.clients, args.deals, args.seed))
+
+
+if __name__ == '__main__':
+    main()
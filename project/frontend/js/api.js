@@ -41,6 +41,10 @@ class ApiClient {
             return null;
         }
 
+        if (options.withHeaders) {
+            return { data: await response.json(), headers: response.headers };
+        }
+
         return response.json();
     }
 
@@ -49,6 +53,16 @@ class ApiClient {
         return this.request(endpoint, { method: 'GET' });
     }
 
+    // GET одной страницы списка: курсор следующей страницы приходит в заголовке X-Next-Cursor
+    async getPage(endpoint, cursor = null) {
+        let url = endpoint;
+        if (cursor) {
+            url += (url.includes('?') ? '&' : '?') + 'cursor=' + encodeURIComponent(cursor);
+        }
+        const { data, headers } = await this.request(url, { method: 'GET', withHeaders: true });
+        return { data, nextCursor: headers.get('X-Next-Cursor') };
+    }
+
     // POST
     async post(endpoint, data) {
         return this.request(endpoint, {
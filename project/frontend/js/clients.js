@@ -1,15 +1,43 @@
 if (!auth.isAuthenticated()) {
     window.location.href = '/login.html';
 }
-let clients;
-// Загрузка сделок
-async function loadClients() {
+const CLIENTS_PAGE_SIZE = 100;
+let clients = [];
+let clientsNextCursor = null;
+let clientsSearch = '';
+
+function clientsUrl() {
+    const query = clientsSearch ? `&search=${encodeURIComponent(clientsSearch)}` : '';
+    return `/api/clients/?limit=${CLIENTS_PAGE_SIZE}${query}`;
+}
+
+// Загрузка первой страницы клиентов (или результатов поиска по имени)
+async function loadClients(search = '') {
+    try {
+        clientsSearch = search;
+        const page = await api.getPage(clientsUrl());
+        // Ответ на устаревший поиск не затирает результаты нового
+        if (search !== clientsSearch) return;
+        clients = page.data;
+        clientsNextCursor = page.nextCursor;
+    } catch (error) {
+        console.error('Ошибка загрузки клиентов:', error);
+    }
+}
+
+// Следующая страница клиентов по курсору с тем же поиском
+async function loadMoreClients() {
+    if (!clientsNextCursor) return;
     try {
-         clients = await api.get('/api/clients/');
+        const search = clientsSearch;
+        const page = await api.getPage(clientsUrl(), clientsNextCursor);
+        if (search !== clientsSearch) return;
+        clients = clients.concat(page.data);
+        clientsNextCursor = page.nextCursor;
     } catch (error) {
         console.error('Ошибка загрузки клиентов:', error);
     }
 }
 (async function () {
     await loadClients();
-})();
\ No newline at end of file
+})();
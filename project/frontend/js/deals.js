@@ -5,16 +5,88 @@ if (!auth.isAuthenticated()) {
 }
 const modal = document.getElementById('modalContainer');
 
-// Загрузка сделок
+const PAGE_SIZE = 100;
+
+// Загруженные страницы списка; дальше меняются событиями с сервера
+let deals = [];
+let dealsNextCursor = null;
+const loadMoreBtn = document.getElementById('loadMoreDealsBtn');
+
+// Первая страница сделок; следующие догружаются кнопкой по курсору
 async function loadDeals() {
     try {
-        const data = await api.get('/api/deals/');
-        renderDeals(data);
+        const page = await api.getPage(`/api/deals/?limit=${PAGE_SIZE}`);
+        deals = page.data;
+        dealsNextCursor = page.nextCursor;
+        renderDeals(deals);
+    } catch (error) {
+        console.error('Ошибка загрузки сделок:', error);
+    }
+}
+
+// Следующая страница по курсору: каждая страница стоит одинаково
+async function loadMoreDeals() {
+    if (!dealsNextCursor) return;
+    loadMoreBtn.disabled = true;
+    try {
+        const page = await api.getPage(`/api/deals/?limit=${PAGE_SIZE}`, dealsNextCursor);
+        const known = new Set(deals.map(deal => deal.id));
+        deals = deals.concat(page.data.filter(deal => !known.has(deal.id)));
+        dealsNextCursor = page.nextCursor;
+        renderDeals(deals);
     } catch (error) {
         console.error('Ошибка загрузки сделок:', error);
+    } finally {
+        loadMoreBtn.disabled = false;
     }
 }
 
+// Применение события сделки к списку без повторной загрузки
+function applyDealEvent(event) {
+    if (event.type === 'bulk') {
+        // Изменённые сделки неизвестны: перечитываем только первую страницу
+        loadDeals();
+        return;
+    }
+    if (event.type === 'deleted') {
+        deals = deals.filter(deal => deal.id !== event.id);
+    } else {
+        const index = deals.findIndex(deal => deal.id === event.deal.id);
+        if (index === -1) {
+            deals.unshift(event.deal);
+        } else {
+            deals[index] = event.deal;
+        }
+    }
+    renderDeals(deals);
+}
+
+// Подписка на события (SSE). После переподключения события могли потеряться - перечитываем список
+// EventSource не передаёт заголовки, поэтому в URL идёт короткоживущий билет, а не токен
+async function subscribeDealEvents(reconnect = false) {
+    let ticket;
+    try {
+        ({ ticket } = await api.post('/api/deals/events/ticket', {}));
+    } catch (error) {
+        setTimeout(() => subscribeDealEvents(reconnect), 3000);
+        return;
+    }
+    const source = new EventSource(`/api/deals/events?ticket=${encodeURIComponent(ticket)}`);
+    let connected = reconnect;
+    source.addEventListener('open', () => {
+        if (connected) loadDeals();
+        connected = true;
+    });
+    source.addEventListener('error', () => {
+        // Билет истёк (401): браузер сам не переподключится, берём новый
+        if (source.readyState === EventSource.CLOSED) {
+            source.close();
+            setTimeout(() => subscribeDealEvents(true), 3000);
+        }
+    });
+    source.addEventListener('deal', (e) => applyDealEvent(JSON.parse(e.data)));
+}
+
 // Отображение сделок по колонкам
 function renderDeals(deals) {
     // Очистить все колонки
@@ -39,6 +111,8 @@ function renderDeals(deals) {
         const countEl = document.querySelector(`.kanban-column[data-status="${status}"] .deal-count`);
         if (countEl) countEl.textContent = counts[status];
     });
+
+    loadMoreBtn.style.display = dealsNextCursor ? '' : 'none';
 }
 
 // Создание карточки сделки
@@ -74,8 +148,9 @@ function handleDragEnd(e) {
 // Обновление статуса
 async function updateDealStatus(dealId, newStatus) {
     try {
-        await api.put(`/api/deals/${dealId}`, { status: newStatus });
-        loadDeals();
+        // Ответ применяется сразу; событие updated от сервера придёт с теми же данными
+        const deal = await api.put(`/api/deals/${dealId}`, { status: newStatus });
+        applyDealEvent({ type: 'updated', deal });
     } catch (error) {
         alert('Ошибка обновления статуса: ' + error.message);
     }
@@ -97,6 +172,7 @@ function escapeHtml(text) {
 
 (async function () {
     await loadDeals();
+    subscribeDealEvents();
 })();
 
 // Настройка drop зон
@@ -121,6 +197,11 @@ document.querySelectorAll('.column-content').forEach(column => {
     });
 });
 
+// Варианты выбора клиента из загруженных страниц
+function clientOptions() {
+    return clients.map(client => `<option value="${client.id}">${escapeHtml(client.name)}</option>`).join('');
+}
+
 function handleAddDeal(e) {
     modal.innerHTML =
         `
@@ -128,11 +209,9 @@ function handleAddDeal(e) {
             <h2>Создать сделку</h2>
             <form>
                 <input name="title" placeholder='Название сделки'>
-                <select name="client_id">
-                ` +
-                clients.map(client => `<option value="${client.id}">${client.name}</option>`)
-                + `
-                </select>
+                <input type="search" class="client-search" placeholder='Поиск клиента' value="${escapeHtml(clientsSearch)}">
+                <select name="client_id">${clientOptions()}</select>
+                <button type="button" class="client-more">Ещё клиенты</button>
                 <input name="amount" placeholder='Сумма сделки'>
                 <input name="status" value="new">
                 <input type="submit" value="Создать">
@@ -140,12 +219,37 @@ function handleAddDeal(e) {
         </div>
         `
     modal.style.display = 'block';
+
+    const select = modal.querySelector('select[name="client_id"]');
+    const moreBtn = modal.querySelector('.client-more');
+    const renderClients = () => {
+        select.innerHTML = clientOptions();
+        moreBtn.style.display = clientsNextCursor ? '' : 'none';
+    };
+    renderClients();
+
+    // Клиенты ищутся на сервере: в списке только загруженные страницы
+    let searchTimer = null;
+    modal.querySelector('.client-search').addEventListener('input', (e) => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(async () => {
+            await loadClients(e.target.value.trim());
+            renderClients();
+        }, 300);
+    });
+    moreBtn.addEventListener('click', async () => {
+        const selected = select.value;
+        await loadMoreClients();
+        renderClients();
+        select.value = selected;
+    });
+
     modal.querySelector('form').addEventListener('submit', async (e) => {
         e.preventDefault();
         const data = Object.fromEntries(new FormData(e.target));
         try {
-            await api.post('/api/deals/', data);
-            loadDeals();
+            const deal = await api.post('/api/deals/', data);
+            applyDealEvent({ type: 'created', deal });
             modal.style.display = 'none';
         } catch (error) {
             alert('Ошибка создания сделки: ' + error.message);
@@ -155,5 +259,6 @@ function handleAddDeal(e) {
 }
 
 document.getElementById('addDealBtn').addEventListener('click', handleAddDeal)
+loadMoreBtn.addEventListener('click', loadMoreDeals)
 
 